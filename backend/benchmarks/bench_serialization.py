@@ -0,0 +1,92 @@
+"""
+Benchmark: list_submissions serialization
+
+Compares the original path (copy each row, validate against
+SubmissionWithDetails, encode with the stdlib) with the trusted path
+(shape rows in place, keep the response fields, encode with orjson).
+Both must produce the same body; that is checked before timing.
+
+Run from the backend directory:
+    python benchmarks/bench_serialization.py
+"""
+import json
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from schemas import SubmissionWithDetails
+from routers.submissions import shape_submission, project_submission
+from utils.responses import ORJSONResponse
+
+
+def make_rows(n: int) -> List[dict]:
+    """Rows shaped like the admin list_submissions query result"""
+    return [
+        {
+            "id": i,
+            "assignment_id": i % 20,
+            "student_id": i,
+            "file_path": f"3f0c6a8e-0d5b-4a7e-9b53-{i:012d}_report.pdf",
+            "file_type": "pdf",
+            "content_hash": f"{i:064x}",
+            "original_filename": "report.pdf",
+            "submitted_at": "2024-03-01T12:34:56.789012+00:00",
+            "status": "reviewed" if i % 2 else "pending",
+            "users": {"name": f"Student {i}"},
+            "assignments": {"title": f"Assignment {i % 20}"},
+            "reviews": [{"id": i, "marks": i % 100, "feedback": "Good effort. Minor improvements needed."}] if i % 2 else [],
+        }
+        for i in range(n)
+    ]
+
+
+def original_path(rows: List[dict]) -> bytes:
+    submissions = []
+    for sub in rows:
+        reviews = sub.get("reviews")
+        marks = None
+        feedback = None
+        if reviews and isinstance(reviews, list) and len(reviews) > 0:
+            first_review = reviews[0]
+            if isinstance(first_review, dict):
+                marks = first_review.get("marks")
+                feedback = first_review.get("feedback")
+        submissions.append({
+            **sub,
+            "student_name": sub.get("users", {}).get("name") if sub.get("users") else None,
+            "assignment_title": sub.get("assignments", {}).get("title") if sub.get("assignments") else None,
+            "marks": marks,
+            "feedback": feedback,
+        })
+    validated = TypeAdapter(List[SubmissionWithDetails]).validate_python(submissions)
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def trusted_path(rows: List[dict]) -> bytes:
+    return ORJSONResponse([project_submission(shape_submission(sub)) for sub in rows]).body
+
+
+def bench(fn, n: int, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        rows = make_rows(n)
+        start = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    assert json.loads(original_path(make_rows(100))) == json.loads(trusted_path(make_rows(100))), "trusted path body differs"
+    
+    print(f"{'rows':>8} {'original (ms)':>14} {'trusted (ms)':>13} {'speedup':>8}")
+    for n in (100, 1000, 10000):
+        original = bench(original_path, n)
+        trusted = bench(trusted_path, n)
+        print(f"{n:>8} {original * 1000:>14.2f} {trusted * 1000:>13.2f} {original / trusted:>7.1f}x")
@@ -0,0 +1,64 @@
+"""
+Benchmark: backend import and startup cost
+
+Measures, each in a fresh interpreter:
+- wall time of `import main` (what every worker pays on spawn)
+- the slowest modules imported by it (python -X importtime)
+- the renderer imports that warm_up() moves off the request path
+
+Run from the backend directory:
+    python benchmarks/bench_startup.py
+"""
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+
+def import_wall_time(module: str, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(f"import {module}")
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def slowest_imports(module: str, top: int = 10):
+    """Parse -X importtime output into (cumulative us, module) pairs for main's direct imports"""
+    stderr = run(f"import {module}", "-X", "importtime").stderr
+    rows = []
+    for line in stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        # Top-level modules are indented by one space, their imports by two more
+        if len(name) - len(name.lstrip()) == 3:
+            rows.append((int(fields[1]), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    baseline = import_wall_time("sys")
+    print(f"interpreter start:        {baseline * 1000:8.1f} ms")
+    print(f"import main:              {(import_wall_time('main') - baseline) * 1000:8.1f} ms")
+
+    renderers = ", ".join(("docx", "pptx", "PIL.Image", "PIL.ImageDraw"))
+    print(f"renderer imports (warmed): {(import_wall_time(renderers) - baseline) * 1000:7.1f} ms")
+
+    print("\nslowest modules imported by main (cumulative):")
+    for cumulative_us, name in slowest_imports("main"):
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
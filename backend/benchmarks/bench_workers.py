@@ -0,0 +1,85 @@
+"""
+Benchmark: throughput vs. number of workers
+
+Starts serve.py with 1, 2 and 4 workers and measures requests/second on
+GET /health from several client processes with keep-alive connections.
+No database is needed: /health does not query Supabase. Scaling is bounded
+by the CPU count, so run it on a machine with at least four cores.
+serve.py runs several workers only with CACHE_BACKEND=redis, so a Redis
+server must be reachable at REDIS_URL.
+
+Run from the backend directory:
+    python benchmarks/bench_workers.py [duration_seconds]
+"""
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 8765
+URL = f"http://127.0.0.1:{PORT}/health"
+CLIENTS = max(2, multiprocessing.cpu_count())
+
+
+def start_server(workers: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "WORKERS": str(workers),
+        "CACHE_BACKEND": "redis",
+        "BIND": f"127.0.0.1:{PORT}",
+        "SUPABASE_URL": os.environ.get("SUPABASE_URL", "http://localhost:54321"),
+        "SUPABASE_KEY": os.environ.get("SUPABASE_KEY", "benchmark"),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "serve.py"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if requests.get(URL, timeout=1).status_code == 200:
+                return server
+        except requests.exceptions.RequestException:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Server did not start")
+
+
+def client(duration: float) -> int:
+    session = requests.Session()
+    count = 0
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        session.get(URL)
+        count += 1
+    return count
+
+
+def measure(workers: int, duration: float) -> float:
+    server = start_server(workers)
+    try:
+        with multiprocessing.Pool(CLIENTS) as pool:
+            counts = pool.map(client, [duration] * CLIENTS)
+        return sum(counts) / duration
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    print(f"{CLIENTS} client processes, {duration:.0f}s per run")
+    print(f"{'workers':>8} {'req/s':>10} {'scaling':>8}")
+    base = None
+    for workers in (1, 2, 4):
+        rate = measure(workers, duration)
+        base = base or rate
+        print(f"{workers:>8} {rate:>10.0f} {rate / base:>7.2f}x")
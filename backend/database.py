@@ -2,24 +2,44 @@
 Supabase Database Connection
 """
 import logging
-from supabase import create_client, Client
+import threading
+from typing import Optional, TYPE_CHECKING
 from config import get_settings
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+if TYPE_CHECKING:
+    from supabase import Client
+
 logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
-try:
-    logger.info(f"Connecting to Supabase at {settings.SUPABASE_URL}")
-    supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-    logger.info("Supabase client initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize Supabase client: {str(e)}")
-    raise
+# Created by init_db() during app startup, not at import time
+_client: Optional["Client"] = None
+_client_lock = threading.Lock()
+
+
+def init_db() -> "Client":
+    """Create the Supabase client (called from the app lifespan)"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            return _client
+        
+        # Imported here: the supabase package is slow to import
+        from supabase import create_client
+        
+        try:
+            logger.info(f"Connecting to Supabase at {settings.SUPABASE_URL}")
+            _client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+            logger.info("Supabase client initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize Supabase client: {str(e)}")
+            raise
+        return _client
 
 
-def get_db() -> Client:
+def get_db() -> "Client":
     """Get Supabase client instance"""
-    return supabase
+    if _client is None:
+        return init_db()
+    return _client
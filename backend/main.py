@@ -1,24 +1,47 @@
 """
 Assignment Platform - FastAPI Backend
 """
-from fastapi import FastAPI
+import logging
+
+from utils.logging_setup import configure_logging, open_log_file, dropped_records, request_id_var, RequestIdMiddleware
+
+# Configure logging once, before any module creates a logger
+configure_logging()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-import os
+from fastapi.responses import JSONResponse
+import threading
 
 from config import get_settings
-from routers import auth, assignments, submissions, reviews, files
+from database import init_db
+from routers import auth, assignments, submissions, reviews, files, exports
+from services.cache import app_cache
+from services.compression import CompressionMiddleware
+from services import file_preview
+from services.storage import storage
 
 settings = get_settings()
 
-# Create uploads directory
-os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup: open the log file and create the DB client, then warm renderers in the background"""
+    open_log_file()
+    init_db()
+    # Runs while the server starts accepting requests
+    threading.Thread(target=file_preview.warm_up, name="preview-warm-up", daemon=True).start()
+    yield
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     description="Backend API for Assignment Submission & Review Platform",
     version="1.0.0",
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 # CORS middleware for Streamlit frontend
@@ -30,38 +53,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Negotiated gzip/brotli compression for JSON and HTML responses
+app.add_middleware(CompressionMiddleware)
+
+# Request IDs for log correlation (outermost, so every log line carries one)
+app.add_middleware(RequestIdMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(assignments.router)
 app.include_router(submissions.router)
 app.include_router(reviews.router)
 app.include_router(files.router)
+app.include_router(exports.router)
 
-import traceback
-import logging
-from fastapi import Request
-from fastapi.responses import JSONResponse
-
-# Configure logging to file
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("backend.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"🔥 GLOBAL EXCEPTION: {exc}")
-    logger.error(traceback.format_exc())
-    print(f"🔥 GLOBAL EXCEPTION: {exc}")
-    traceback.print_exc()
+    logger.error(
+        "Unhandled exception",
+        exc_info=exc,
+        extra={"method": request.method, "path": request.url.path}
+    )
     return JSONResponse(
         status_code=500,
         content={"detail": f"Internal Server Error: {str(exc)}"},
+        headers={"X-Request-ID": request_id_var.get()}
     )
 
 async def root():
@@ -79,10 +97,14 @@ async def health_check():
     return {
         "status": "healthy",
         "database": "supabase",
-        "upload_dir": settings.UPLOAD_DIR
+        "storage": storage.name,
+        "cache": app_cache.stats(),
+        "renderer_imports": file_preview.import_timings,
+        "dropped_log_records": dropped_records()
     }
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # log_config=None keeps uvicorn from replacing the logging setup
+    uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
@@ -1,14 +1,34 @@
 """
 Assignments Router - CRUD operations for assignments
 """
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Iterator
 from database import get_db
 from schemas import AssignmentCreate, AssignmentResponse, TokenData
 from utils.auth import get_current_user, require_admin
+from config import get_settings
+from services.versioning import table_versions, make_etag, etag_matches
+from services.cache import app_cache
+from services.archive import iter_zip, archive_name
+from services.blobs import original_filename
+from services.limits import ConcurrencyLimiter
+from services.storage import content_disposition
 
+settings = get_settings()
 router = APIRouter(prefix="/assignments", tags=["Assignments"])
 
+archive_limiter = ConcurrencyLimiter("archive", settings.MAX_ARCHIVE_DOWNLOADS_PER_USER)
+
+
+def _check_not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Return a 304 response if the client's copy is current, else set validators"""
+    headers = {"ETag": etag, "Cache-Control": settings.CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
 
 @router.post("/", response_model=AssignmentResponse, status_code=status.HTTP_201_CREATED)
 def create_assignment(
@@ -32,37 +52,61 @@ def create_assignment(
             detail="Failed to create assignment"
         )
     
+    # Invalidate before bumping, so no request that sees the new version
+    # can still be served the old cached rows
+    app_cache.invalidate("assignments")
+    table_versions.bump("assignments")
     return result.data[0]
 
 
 @router.get("/", response_model=List[AssignmentResponse])
 def list_assignments(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     current_user: TokenData = Depends(get_current_user)
 ):
     """List all assignments with pagination"""
-    db = get_db()
-    result = db.table("assignments").select("*").order("created_at", desc=True).range(skip, skip + limit - 1).execute()
-    return result.data
+    etag = make_etag("assignments", table_versions.get("assignments"), skip, limit)
+    not_modified = _check_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+    
+    def load():
+        db = get_db()
+        result = db.table("assignments").select("*").order("created_at", desc=True).range(skip, skip + limit - 1).execute()
+        return result.data
+    
+    return app_cache.get_or_load("assignments", f"list:{skip}:{limit}", load)
 
 
 @router.get("/{assignment_id}", response_model=AssignmentResponse)
 def get_assignment(
     assignment_id: int,
+    request: Request,
+    response: Response,
     current_user: TokenData = Depends(get_current_user)
 ):
     """Get a specific assignment"""
-    db = get_db()
-    result = db.table("assignments").select("*").eq("id", assignment_id).execute()
+    etag = make_etag("assignments", table_versions.get("assignments"), assignment_id)
+    not_modified = _check_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
     
-    if not result.data:
+    def load():
+        db = get_db()
+        result = db.table("assignments").select("*").eq("id", assignment_id).execute()
+        return result.data[0] if result.data else None
+    
+    assignment = app_cache.get_or_load("assignments", f"id:{assignment_id}", load)
+    if assignment is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Assignment not found"
         )
     
-    return result.data[0]
+    return assignment
 
 
 @router.put("/{assignment_id}", response_model=AssignmentResponse)
@@ -87,6 +131,8 @@ def update_assignment(
             detail="Assignment not found"
         )
     
+    app_cache.invalidate("assignments")
+    table_versions.bump("assignments")
     return result.data[0]
 
 
@@ -98,3 +144,89 @@ def delete_assignment(
     """Delete an assignment (admin only)"""
     db = get_db()
     db.table("assignments").delete().eq("id", assignment_id).execute()
+    app_cache.invalidate("assignments")
+    # Submissions and their reviews are removed by ON DELETE CASCADE
+    app_cache.invalidate("reviews")
+    table_versions.bump("assignments")
+
+
+@router.get("/{assignment_id}/submissions.zip")
+def download_submissions_zip(
+    assignment_id: int,
+    part: int = Query(1, ge=1),
+    current_user: TokenData = Depends(require_admin)
+):
+    """
+    Download submitted files for an assignment as a ZIP (admin only)
+    
+    Large assignments are split into parts of ARCHIVE_PART_SIZE submissions.
+    Each part is a complete archive, so an interrupted download can be
+    resumed by fetching the same part again. X-Archive-Has-More tells the
+    client whether to request the next part.
+    """
+    db = get_db()
+    
+    # Fetch one extra row to know whether another part follows
+    offset = (part - 1) * settings.ARCHIVE_PART_SIZE
+    result = db.table("submissions").select(
+        "id, file_path, original_filename, users!student_id(name)"
+    ).eq("assignment_id", assignment_id).order("id").range(offset, offset + settings.ARCHIVE_PART_SIZE).execute()
+    
+    rows = result.data or []
+    has_more = len(rows) > settings.ARCHIVE_PART_SIZE
+    rows = rows[:settings.ARCHIVE_PART_SIZE]
+    
+    if not rows and part == 1:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No submissions found for this assignment"
+        )
+    
+    if not archive_limiter.acquire(current_user.user_id):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many archive downloads in progress"
+        )
+    
+    try:
+        used_names = set()
+        entries = []
+        for row in rows:
+            original_name = original_filename(row)
+            student_name = (row.get("users") or {}).get("name")
+            entries.append((archive_name(student_name, original_name, used_names), row["file_path"]))
+        
+        filename = f"assignment_{assignment_id}_submissions" + (f"_part{part}" if part > 1 or has_more else "") + ".zip"
+        return _ArchiveResponse(
+            current_user.user_id,
+            iter_zip(entries),
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": content_disposition("attachment", filename),
+                "X-Archive-Part": str(part),
+                "X-Archive-Has-More": "true" if has_more else "false"
+            }
+        )
+    except Exception:
+        archive_limiter.release(current_user.user_id)
+        raise
+
+
+class _ArchiveResponse(StreamingResponse):
+    """
+    Streaming archive that holds the user's archive slot while it is sent
+    
+    The slot is released when sending ends for any reason, including a
+    client that disconnects before the body starts (the body iterator's
+    own cleanup would never run then).
+    """
+    
+    def __init__(self, user_id: int, content: Iterator[bytes], **kwargs):
+        super().__init__(content, **kwargs)
+        self.user_id = user_id
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            archive_limiter.release(self.user_id)
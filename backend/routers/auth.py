@@ -1,47 +1,35 @@
 """
 Authentication Router - Login & Registration
 """
+import logging
 from fastapi import APIRouter, HTTPException, status, Depends
 from database import get_db
 from schemas import UserCreate, UserLogin, UserResponse, Token
 from utils.auth import hash_password, verify_password, create_access_token, get_current_user
+from services.cache import app_cache
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
+logger = logging.getLogger("api.auth")
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(user: UserCreate):
     """Register a new user"""
-    print(f"DEBUG: Entering register handler for {user.email}")
-    # Import logger from database (or set up new one)
-    import logging
-    logger = logging.getLogger("api.auth")
-    
-    logger.info(f"Attempting registration for email: {user.email}")
-    
     try:
         db = get_db()
         
         # Check if user already exists
-        logger.info("Checking for existing user...")
         existing = db.table("users").select("id").eq("email", user.email).execute()
         
         if existing.data:
-            logger.warning(f"Email already registered: {user.email}")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
         
         # Create user
-        logger.info("Creating new user...")
         hashed_pw = hash_password(user.password)
-        
-        # Debug role value
-        logger.info(f"DEBUG: user.role type: {type(user.role)}")
-        logger.info(f"DEBUG: user.role value: {user.role}")
         role_value = user.role.value if hasattr(user.role, "value") else str(user.role)
-        logger.info(f"DEBUG: Final role value to DB: '{role_value}'")
 
         user_data = {
             "email": user.email,
@@ -55,22 +43,20 @@ async def register(user: UserCreate):
         
         result = db.table("users").insert(user_data).execute()
         
-        logger.info(f"Insert result: {result}")
-        
         if not result.data:
-            logger.error("Database returned no data after insert")
+            logger.error("Database returned no data after user insert")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to create user - no data returned from database"
             )
         
-        logger.info("User created successfully")
+        logger.info("User registered", extra={"user_id": result.data[0]["id"], "role": role_value})
         return result.data[0]
             
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Registration error: {str(e)}")
+        logger.exception("Registration failed")
         # Check for common Supabase errors
         error_msg = str(e)
         if "relation" in error_msg and "does not exist" in error_msg:
@@ -114,13 +100,18 @@ async def login(credentials: UserLogin):
 @router.get("/me", response_model=UserResponse)
 async def get_me(current_user = Depends(get_current_user)):
     """Get current user profile"""
-    db = get_db()
-    result = db.table("users").select("*").eq("id", current_user.user_id).execute()
+    def load():
+        db = get_db()
+        result = db.table("users").select(
+            "id, email, name, role, created_at"
+        ).eq("id", current_user.user_id).execute()
+        return result.data[0] if result.data else None
     
-    if not result.data:
+    user = app_cache.get_or_load("users", f"id:{current_user.user_id}", load)
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    return result.data[0]
+    return user
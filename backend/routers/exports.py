@@ -0,0 +1,109 @@
+"""
+Exports Router - Streaming CSV exports for admins
+"""
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from typing import Optional, Iterator
+import csv
+import io
+
+from database import get_db
+from schemas import TokenData
+from utils.auth import require_admin
+from config import get_settings
+
+settings = get_settings()
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+GRADEBOOK_COLUMNS = [
+    "submission_id", "student_name", "assignment_title", "status",
+    "marks", "feedback", "submitted_at", "reviewed_at"
+]
+
+# Text starting with these is run as a formula by Excel and Sheets
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+@router.get("/gradebook.csv")
+def export_gradebook(
+    assignment_id: Optional[int] = None,
+    current_user: TokenData = Depends(require_admin)
+):
+    """Stream the gradebook as CSV, optionally for a single assignment (admin only)"""
+    filename = f"gradebook_{assignment_id}.csv" if assignment_id else "gradebook.csv"
+    return StreamingResponse(
+        _iter_gradebook(assignment_id),
+        media_type="text/csv",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
+
+
+def _iter_gradebook(assignment_id: Optional[int]) -> Iterator[str]:
+    """
+    Yield the gradebook CSV one page of rows at a time
+    
+    PostgREST has no server-side cursors, so rows are read with keyset
+    pagination on submissions.id. Only one page is held in memory, and the
+    header is sent before the first query so the download starts at once.
+    """
+    db = get_db()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    
+    writer.writerow(GRADEBOOK_COLUMNS)
+    yield _drain(buffer)
+    
+    last_id = 0
+    while True:
+        query = db.table("submissions").select(
+            "id, status, submitted_at, users!student_id(name), "
+            "assignments!assignment_id(title), reviews(marks, feedback, reviewed_at)"
+        ).gt("id", last_id)
+        if assignment_id is not None:
+            query = query.eq("assignment_id", assignment_id)
+        rows = query.order("id").limit(settings.EXPORT_PAGE_SIZE).execute().data or []
+        
+        for row in rows:
+            student = row.get("users") or {}
+            assignment = row.get("assignments") or {}
+            review = _first_review(row.get("reviews"))
+            writer.writerow([
+                row["id"],
+                _csv_text(student.get("name")),
+                _csv_text(assignment.get("title")),
+                row.get("status"),
+                review.get("marks"),
+                _csv_text(review.get("feedback")),
+                row.get("submitted_at"),
+                review.get("reviewed_at"),
+            ])
+        
+        if rows:
+            yield _drain(buffer)
+            last_id = rows[-1]["id"]
+        if len(rows) < settings.EXPORT_PAGE_SIZE:
+            break
+
+
+def _first_review(reviews) -> dict:
+    """The review embedded in a submissions row (a list, or an object for a one-to-one embed)"""
+    if isinstance(reviews, list):
+        reviews = reviews[0] if reviews else None
+    return reviews if isinstance(reviews, dict) else {}
+
+
+def _csv_text(value: Optional[str]) -> Optional[str]:
+    """Quote user-entered text that a spreadsheet would run as a formula"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _drain(buffer: io.StringIO) -> str:
+    """Return and clear the buffered CSV text"""
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
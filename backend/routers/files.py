@@ -1,41 +1,35 @@
 """
-Files Router - File preview endpoints
+Files Router - File preview and download endpoints
+
+Storage, Supabase and the preview renderers all block, so the endpoints
+are plain functions: FastAPI runs them on its threadpool instead of the
+event loop.
 """
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Header
 from fastapi.responses import Response, StreamingResponse
-import os
-import io
+from typing import Optional, Tuple
 import base64
-from typing import Optional
+import mimetypes
 
 from database import get_db
 from schemas import TokenData, UserRole
-from utils.auth import get_current_user, get_current_user_flexible
+from utils.auth import get_current_user, get_current_user_flexible, require_admin
 from config import get_settings
-from services.file_preview import get_file_preview, get_preview_content_type
+from services.file_preview import get_cached_preview, get_preview_content_type
+from services.compression import negotiate_encoding
+from services.storage import storage, verify_signature, content_disposition
+from services.blobs import original_filename, verify_blob, collect_garbage
 
 settings = get_settings()
 router = APIRouter(prefix="/files", tags=["Files"])
 
 
-@router.get("/preview/{submission_id}")
-async def preview_file(
-    submission_id: int,
-    page: Optional[int] = None,
-    current_user: TokenData = Depends(get_current_user_flexible)
-):
-    """
-    Get file preview for a submission
-    - PDF: Returns the PDF for iframe embedding
-    - DOCX: Returns HTML content
-    - PPT/PPTX: Returns slide images
-    """
+def _get_submission(submission_id: int, current_user: TokenData, detail: str) -> dict:
+    """Fetch a submission, students can only see their own"""
     db = get_db()
     
-    # Get submission
     query = db.table("submissions").select("*").eq("id", submission_id)
     
-    # Students can only view their own files
     if current_user.role != UserRole.ADMIN:
         query = query.eq("student_id", current_user.user_id)
     
@@ -44,13 +38,109 @@ async def preview_file(
     if not result.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Submission not found or access denied"
+            detail=detail
         )
     
-    submission = result.data[0]
-    file_path = os.path.join(settings.UPLOAD_DIR, submission["file_path"])
+    return result.data[0]
+
+
+def _parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range "bytes=start-end" header
+    
+    Returns:
+        (start, end) inclusive, or None to send the whole file (no or malformed header)
     
-    if not os.path.exists(file_path):
+    Raises:
+        ValueError: If the range cannot be satisfied
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    first, _, last = range_header[6:].split(",")[0].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def _stream_object(
+    key: str,
+    range_header: Optional[str],
+    media_type: str,
+    disposition: str,
+    content_hash: Optional[str] = None
+) -> Response:
+    """Stream a stored file, honouring Range requests (206 Partial Content)"""
+    info = storage.stat(key)
+    if info is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found on server"
+        )
+    
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": disposition,
+        "ETag": f'"{content_hash or info.version}"'
+    }
+    if content_hash:
+        # Lets clients check the integrity of what they downloaded (RFC 9530)
+        headers["Repr-Digest"] = f"sha-256=:{base64.b64encode(bytes.fromhex(content_hash)).decode('ascii')}:"
+    try:
+        byte_range = _parse_range(range_header, info.size)
+    except ValueError:
+        return Response(
+            status_code=416,  # Range Not Satisfiable
+            headers={"Content-Range": f"bytes */{info.size}"}
+        )
+    
+    if byte_range is None:
+        headers["Content-Length"] = str(info.size)
+        return StreamingResponse(storage.iter_range(key), media_type=media_type, headers=headers)
+    
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{info.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        storage.iter_range(key, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers=headers
+    )
+
+
+@router.get("/preview/{submission_id}")
+def preview_file(
+    submission_id: int,
+    page: Optional[int] = None,
+    accept_encoding: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    current_user: TokenData = Depends(get_current_user_flexible)
+):
+    """
+    Get file preview for a submission
+    - PDF: Streams the PDF for iframe embedding (supports Range requests)
+    - DOCX: Returns HTML content
+    - PPT/PPTX: Returns slide images
+    """
+    submission = _get_submission(submission_id, current_user, "Submission not found or access denied")
+    key = submission["file_path"]
+    disposition = content_disposition("inline", f"preview.{submission['file_type']}")
+    
+    if submission["file_type"] == "pdf":
+        return _stream_object(key, range_header, "application/pdf", disposition, submission.get("content_hash"))
+    
+    if not submission.get("content_hash") and storage.stat(key) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found on server"
@@ -58,15 +148,31 @@ async def preview_file(
     
     # Get preview content
     try:
-        preview_data = get_file_preview(file_path, submission["file_type"], page)
+        preview_data, encoding = get_cached_preview(
+            key,
+            submission["file_type"],
+            page,
+            negotiate_encoding(accept_encoding),
+            submission.get("content_hash")
+        )
         content_type = get_preview_content_type(submission["file_type"])
         
+        headers = {
+            "Content-Disposition": disposition
+        }
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            headers["Vary"] = "Accept-Encoding"
+        
         return Response(
             content=preview_data,
             media_type=content_type,
-            headers={
-                "Content-Disposition": f"inline; filename=preview.{submission['file_type']}"
-            }
+            headers=headers
+        )
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found on server"
         )
     except Exception as e:
         raise HTTPException(
@@ -76,80 +182,104 @@ async def preview_file(
 
 
 @router.get("/preview/{submission_id}/info")
-async def get_file_info(
+def get_file_info(
     submission_id: int,
     current_user: TokenData = Depends(get_current_user)
 ):
     """Get file metadata for preview rendering"""
-    db = get_db()
-    
-    query = db.table("submissions").select("*").eq("id", submission_id)
-    
-    if current_user.role != UserRole.ADMIN:
-        query = query.eq("student_id", current_user.user_id)
-    
-    result = query.execute()
-    
-    if not result.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Submission not found"
-        )
-    
-    submission = result.data[0]
-    file_path = os.path.join(settings.UPLOAD_DIR, submission["file_path"])
+    submission = _get_submission(submission_id, current_user, "Submission not found")
     
     # Get file size and page count if applicable
     from services.file_preview import get_file_info as get_info
-    file_info = get_info(file_path, submission["file_type"])
+    file_info = get_info(submission["file_path"], submission["file_type"])
     
     return {
         "file_type": submission["file_type"],
-        "original_name": submission["file_path"].split("_", 1)[1] if "_" in submission["file_path"] else submission["file_path"],
+        "original_name": original_filename(submission),
+        "content_hash": submission.get("content_hash"),
         **file_info
     }
 
 
 @router.get("/download/{submission_id}")
-async def download_file(
+def download_file(
     submission_id: int,
+    range_header: Optional[str] = Header(None, alias="Range"),
     current_user: TokenData = Depends(get_current_user)
 ):
-    """Download the original file"""
-    db = get_db()
-    
-    query = db.table("submissions").select("*").eq("id", submission_id)
-    
-    if current_user.role != UserRole.ADMIN:
-        query = query.eq("student_id", current_user.user_id)
+    """Download the original file (supports Range requests for resuming)"""
+    submission = _get_submission(submission_id, current_user, "Submission not found")
     
-    result = query.execute()
+    return _stream_object(
+        submission["file_path"],
+        range_header,
+        "application/octet-stream",
+        content_disposition("attachment", original_filename(submission)),
+        submission.get("content_hash")
+    )
+
+
+@router.get("/url/{submission_id}")
+def get_file_url(
+    submission_id: int,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """
+    Get a time-limited URL for the original file
     
-    if not result.data:
+    The URL needs no auth header, so it can be handed to a browser or
+    PDF viewer directly. With S3 storage it points at the bucket itself.
+    """
+    submission = _get_submission(submission_id, current_user, "Submission not found")
+    url = storage.signed_url(
+        submission["file_path"],
+        settings.SIGNED_URL_TTL_SECONDS,
+        filename=original_filename(submission)
+    )
+    return {"url": url, "expires_in": settings.SIGNED_URL_TTL_SECONDS}
+
+
+@router.get("/signed/{key:path}")
+def get_signed_file(
+    key: str,
+    expires: int,
+    signature: str,
+    filename: Optional[str] = None,
+    range_header: Optional[str] = Header(None, alias="Range")
+):
+    """Serve a file through a signed URL issued by local storage"""
+    if not verify_signature(key, expires, signature, filename):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Submission not found"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or expired link"
         )
     
-    submission = result.data[0]
-    file_path = os.path.join(settings.UPLOAD_DIR, submission["file_path"])
-    
-    if not os.path.exists(file_path):
+    disposition = content_disposition("attachment", filename) if filename else "inline"
+    media_type = mimetypes.guess_type(filename or key)[0] or "application/octet-stream"
+    return _stream_object(key, range_header, media_type, disposition)
+
+
+@router.get("/verify/{submission_id}")
+def verify_file(
+    submission_id: int,
+    current_user: TokenData = Depends(require_admin)
+):
+    """Re-hash a stored file and compare it with its recorded SHA-256 (admin only)"""
+    submission = _get_submission(submission_id, current_user, "Submission not found")
+    content_hash = submission.get("content_hash")
+    if not content_hash:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="File not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Submission was stored before content hashing"
         )
     
-    # Get original filename
-    original_name = submission["file_path"].split("_", 1)[1] if "_" in submission["file_path"] else submission["file_path"]
-    
-    with open(file_path, "rb") as f:
-        content = f.read()
-    
-    return Response(
-        content=content,
-        media_type="application/octet-stream",
-        headers={
-            "Content-Disposition": f"attachment; filename={original_name}"
-        }
-    )
+    return {
+        "content_hash": content_hash,
+        "valid": verify_blob(content_hash)
+    }
+
+
+@router.post("/blobs/collect")
+def collect_unreferenced_blobs(current_user: TokenData = Depends(require_admin)):
+    """Delete stored files no submission references any more (admin only)"""
+    return {"removed": collect_garbage()}
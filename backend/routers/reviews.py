@@ -1,15 +1,34 @@
 """
 Reviews Router - Grade submissions and provide feedback
 """
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File
+from typing import List, Dict, Any
+import csv
+import io
+
 from database import get_db
-from schemas import ReviewCreate, ReviewResponse, TokenData, SubmissionStatus
+from schemas import (
+    ReviewCreate, ReviewResponse, ReviewBulkRequest, ReviewBulkResult,
+    TokenData, SubmissionStatus
+)
 from utils.auth import require_admin
+from config import get_settings
+from services.cache import app_cache
 
+settings = get_settings()
 router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
 
+def _get_max_marks(assignment_ids: List[int]) -> Dict[int, int]:
+    """Get max marks for a set of assignments, reading through the cache"""
+    def load(missing: List[int]) -> Dict[int, int]:
+        db = get_db()
+        result = db.table("assignments").select("id, max_marks").in_("id", missing).execute()
+        return {row["id"]: row.get("max_marks", 100) for row in result.data or []}
+    
+    return app_cache.get_many_or_load("assignments", "max_marks", assignment_ids, load)
+
+
 @router.post("/", response_model=ReviewResponse, status_code=status.HTTP_201_CREATED)
 def create_review(
     review: ReviewCreate,
@@ -20,7 +39,7 @@ def create_review(
     
     # Check submission exists and get max marks
     submission = db.table("submissions").select(
-        "*, assignments!assignment_id(max_marks)"
+        "id, assignment_id"
     ).eq("id", review.submission_id).execute()
     
     if not submission.data:
@@ -29,7 +48,8 @@ def create_review(
             detail="Submission not found"
         )
     
-    max_marks = submission.data[0].get("assignments", {}).get("max_marks", 100)
+    assignment_id = submission.data[0]["assignment_id"]
+    max_marks = _get_max_marks([assignment_id]).get(assignment_id, 100)
     
     # Validate marks
     if review.marks < 0 or review.marks > max_marks:
@@ -67,6 +87,7 @@ def create_review(
         "status": SubmissionStatus.REVIEWED.value
     }).eq("id", review.submission_id).execute()
     
+    app_cache.invalidate("reviews")
     return result.data[0]
 
 
@@ -76,13 +97,153 @@ def get_review_by_submission(
     current_user: TokenData = Depends(require_admin)
 ):
     """Get review for a specific submission"""
-    db = get_db()
-    result = db.table("reviews").select("*").eq("submission_id", submission_id).execute()
+    def load():
+        db = get_db()
+        result = db.table("reviews").select("*").eq("submission_id", submission_id).execute()
+        return result.data[0] if result.data else None
     
-    if not result.data:
+    review = app_cache.get_or_load("reviews", f"submission:{submission_id}", load)
+    if review is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Review not found"
         )
     
-    return result.data[0]
+    return review
+
+
+@router.post("/bulk", response_model=List[ReviewBulkResult])
+def create_reviews_bulk(
+    payload: ReviewBulkRequest,
+    current_user: TokenData = Depends(require_admin)
+):
+    """Create or update reviews for a batch of submissions (admin only)"""
+    entries = [(i + 1, review, None) for i, review in enumerate(payload.reviews)]
+    return _apply_bulk_reviews(entries, current_user.user_id)
+
+
+@router.post("/bulk/csv", response_model=List[ReviewBulkResult])
+async def create_reviews_bulk_csv(
+    file: UploadFile = File(...),
+    current_user: TokenData = Depends(require_admin)
+):
+    """
+    Create or update reviews from a CSV upload (admin only)
+    
+    Expected columns: submission_id, marks, feedback (optional)
+    """
+    content = await file.read()
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV file must be UTF-8 encoded"
+        )
+    
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or not {"submission_id", "marks"} <= set(reader.fieldnames):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV must have 'submission_id' and 'marks' columns"
+        )
+    
+    entries = []
+    for i, row in enumerate(reader):
+        try:
+            review = ReviewCreate(
+                submission_id=int(row["submission_id"]),
+                marks=int(row["marks"]),
+                feedback=row.get("feedback") or None
+            )
+            entries.append((i + 1, review, None))
+        except (TypeError, ValueError):
+            entries.append((i + 1, None, "Invalid submission_id or marks"))
+    
+    return _apply_bulk_reviews(entries, current_user.user_id)
+
+
+def _apply_bulk_reviews(entries: List[tuple], reviewer_id: int) -> List[Dict[str, Any]]:
+    """
+    Validate and save a batch of reviews with a fixed number of queries
+    
+    Args:
+        entries: (row number, ReviewCreate or None, parse error or None) tuples
+        reviewer_id: ID of the admin saving the reviews
+    
+    Returns:
+        list: One result per entry, in input order
+    """
+    if len(entries) > settings.BULK_REVIEW_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many rows. Max per batch: {settings.BULK_REVIEW_MAX_ROWS}"
+        )
+    
+    db = get_db()
+    results = []
+    
+    # Later rows win when a submission appears more than once
+    last_row = {review.submission_id: row for row, review, _ in entries if review}
+    
+    # Fetch the assignment of every submission in one query, max marks from the cache
+    submission_ids = list(last_row)
+    max_marks = {}
+    if submission_ids:
+        submissions = db.table("submissions").select(
+            "id, assignment_id"
+        ).in_("id", submission_ids).execute()
+        assignment_max_marks = _get_max_marks([sub["assignment_id"] for sub in submissions.data or []])
+        for sub in submissions.data or []:
+            max_marks[sub["id"]] = assignment_max_marks.get(sub["assignment_id"], 100)
+    
+    rows = []
+    for row, review, error in entries:
+        result = {
+            "row": row,
+            "submission_id": review.submission_id if review else None,
+            "success": False,
+            "review_id": None,
+            "error": error,
+        }
+        results.append(result)
+        
+        if review is None:
+            continue
+        if last_row[review.submission_id] != row:
+            result["error"] = f"Superseded by row {last_row[review.submission_id]}"
+        elif review.submission_id not in max_marks:
+            result["error"] = "Submission not found"
+        elif review.marks < 0 or review.marks > max_marks[review.submission_id]:
+            result["error"] = f"Marks must be between 0 and {max_marks[review.submission_id]}"
+        else:
+            rows.append({
+                "submission_id": review.submission_id,
+                "reviewer_id": reviewer_id,
+                "marks": review.marks,
+                "feedback": review.feedback
+            })
+    
+    if not rows:
+        return results
+    
+    # Insert or update all valid reviews in one statement
+    saved = db.table("reviews").upsert(rows, on_conflict="submission_id").execute()
+    review_ids = {r["submission_id"]: r["id"] for r in saved.data or []}
+    
+    # Mark all graded submissions as reviewed in one statement
+    if review_ids:
+        db.table("submissions").update({
+            "status": SubmissionStatus.REVIEWED.value
+        }).in_("id", list(review_ids)).execute()
+    app_cache.invalidate("reviews")
+    
+    for result in results:
+        if result["error"] is None:
+            review_id = review_ids.get(result["submission_id"])
+            result["success"] = review_id is not None
+            result["review_id"] = review_id
+            if review_id is None:
+                result["error"] = "Failed to save review"
+    
+    return results
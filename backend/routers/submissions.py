@@ -1,36 +1,137 @@
 """
 Submissions Router - File upload and submission management
 """
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form, Header
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from postgrest.exceptions import APIError
+from typing import List, Optional
 import os
-import uuid
 from datetime import datetime
 
 from database import get_db
 from schemas import SubmissionResponse, SubmissionWithDetails, TokenData, UserRole, SubmissionStatus
 from utils.auth import get_current_user, require_admin
 from config import get_settings
+from utils.responses import ORJSONResponse
+from services.idempotency import idempotency_store, scoped_key, request_fingerprint, IN_FLIGHT, MISMATCH
+from services.blobs import hash_file, store_blob
 
 settings = get_settings()
 router = APIRouter(prefix="/submissions", tags=["Submissions"])
 
-# Ensure upload directory exists
-os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-
 
 def get_file_extension(filename: str) -> str:
     """Extract file extension"""
     return filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
 
 
+def shape_submission(sub: dict) -> dict:
+    """
+    Flatten embedded joins into SubmissionWithDetails fields
+    
+    Works in place on the row returned by Supabase so large lists are not
+    copied row by row.
+    """
+    users = sub.pop("users", None)
+    assignments = sub.pop("assignments", None)
+    reviews = sub.pop("reviews", None)
+    
+    # Safely extract review data
+    review = reviews[0] if reviews and isinstance(reviews, list) and isinstance(reviews[0], dict) else None
+    
+    sub["student_name"] = users.get("name") if users else None
+    sub["assignment_title"] = assignments.get("title") if assignments else None
+    sub["marks"] = review.get("marks") if review else None
+    sub["feedback"] = review.get("feedback") if review else None
+    return sub
+
+
+# Fields of a listed submission, in the order response_model validation emits them
+SUBMISSION_LIST_FIELDS = tuple(SubmissionWithDetails.model_fields)
+
+
+def project_submission(sub: dict) -> dict:
+    """
+    Reduce a shaped row to the SubmissionWithDetails fields
+    
+    Gives the trusted (unvalidated) list path the same body as response_model
+    validation: other columns are dropped and submitted_at is parsed, so
+    ORJSONResponse formats it the way Pydantic does.
+    """
+    row = {field: sub.get(field) for field in SUBMISSION_LIST_FIELDS}
+    row["submitted_at"] = datetime.fromisoformat(row["submitted_at"])
+    return row
+
+
+# Postgres error codes raised through PostgREST
+FOREIGN_KEY_VIOLATION = "23503"
+UNIQUE_VIOLATION = "23505"
+
+
 @router.post("/", response_model=SubmissionResponse, status_code=status.HTTP_201_CREATED)
 async def submit_assignment(
     assignment_id: int = Form(...),
     file: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None),
     current_user: TokenData = Depends(get_current_user)
 ):
-    """Submit an assignment with file upload"""
+    """
+    Submit an assignment with file upload
+    
+    Send an Idempotency-Key header to make retries safe: a repeated request
+    with the same key returns the original submission without storing the
+    file again. Reusing a key for another assignment or file is rejected (422).
+    """
+    key = scoped_key(current_user.user_id, idempotency_key) if idempotency_key else None
+    content_hash = None
+    if key:
+        content_hash, _ = await run_in_threadpool(hash_file, file.file)
+        fingerprint = request_fingerprint(current_user.user_id, assignment_id, content_hash)
+        previous = idempotency_store.begin(key, fingerprint)
+        if previous is MISMATCH:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="This Idempotency-Key was already used for a different request"
+            )
+        if previous is IN_FLIGHT:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is already in progress"
+            )
+        if previous is not None:
+            return JSONResponse(
+                status_code=status.HTTP_201_CREATED,
+                content=previous,
+                headers={"Idempotent-Replayed": "true"}
+            )
+    
+    try:
+        submission = await _create_submission(assignment_id, file, current_user, content_hash)
+    except BaseException:
+        if key:
+            idempotency_store.release(key)
+        raise
+    
+    if key:
+        idempotency_store.complete(key, fingerprint, SubmissionResponse(**submission).model_dump(mode="json"))
+    return submission
+
+
+async def _create_submission(
+    assignment_id: int,
+    file: UploadFile,
+    current_user: TokenData,
+    content_hash: Optional[str] = None
+) -> dict:
+    """
+    Store the file and insert the submission row
+    
+    The assignment FK and the UNIQUE(assignment_id, student_id) constraint
+    do the existence and duplicate checks, so there are no pre-flight queries.
+    Files are content-addressed: a file already stored (by anyone) is not
+    stored again. Pass content_hash if the file has been hashed already.
+    """
     db = get_db()
     
     # Validate file extension
@@ -41,48 +142,47 @@ async def submit_assignment(
             detail=f"File type not allowed. Allowed: {settings.ALLOWED_EXTENSIONS}"
         )
     
-    # Check assignment exists
-    assignment = db.table("assignments").select("id").eq("id", assignment_id).execute()
-    if not assignment.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Assignment not found"
-        )
-    
-    # Check if already submitted
-    existing = db.table("submissions").select("id").eq("assignment_id", assignment_id).eq("student_id", current_user.user_id).execute()
-    if existing.data:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You have already submitted this assignment"
-        )
-    
-    # Save file
-    unique_filename = f"{uuid.uuid4()}_{file.filename}"
-    file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
-    
-    content = await file.read()
-    if len(content) > settings.MAX_FILE_SIZE:
+    # The upload is already spooled to a temporary file, check its size
+    # without reading it into memory
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    if size > settings.MAX_FILE_SIZE:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"File too large. Max size: {settings.MAX_FILE_SIZE // (1024*1024)}MB"
         )
     
-    with open(file_path, "wb") as f:
-        f.write(content)
+    # Save file, once per content hash: re-uploads of the same file reuse the stored blob
+    filename = os.path.basename(file.filename.replace("\\", "/"))
+    content_hash, storage_key = await run_in_threadpool(store_blob, file.file, file.content_type, content_hash)
     
     # Create submission record
-    result = db.table("submissions").insert({
-        "assignment_id": assignment_id,
-        "student_id": current_user.user_id,
-        "file_path": unique_filename,
-        "file_type": ext,
-        "status": SubmissionStatus.PENDING.value
-    }).execute()
+    try:
+        result = db.table("submissions").insert({
+            "assignment_id": assignment_id,
+            "student_id": current_user.user_id,
+            "file_path": storage_key,
+            "file_type": ext,
+            "content_hash": content_hash,
+            "original_filename": filename,
+            "status": SubmissionStatus.PENDING.value
+        }).execute()
+    except APIError as e:
+        # An unreferenced blob is removed later by collect_garbage()
+        if e.code == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Assignment not found"
+            )
+        if e.code == UNIQUE_VIOLATION:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You have already submitted this assignment"
+            )
+        raise
     
     if not result.data:
-        # Clean up file on failure
-        os.remove(file_path)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create submission"
@@ -112,28 +212,11 @@ def list_submissions(
         ).eq("student_id", current_user.user_id).order("submitted_at", desc=True).range(skip, skip + limit - 1).execute()
     
     # Transform response
-    submissions = []
-    for sub in result.data:
-        reviews = sub.get("reviews")
-        marks = None
-        feedback = None
-        
-        # Safely extract review data
-        if reviews and isinstance(reviews, list) and len(reviews) > 0:
-            first_review = reviews[0]
-            if isinstance(first_review, dict):
-                marks = first_review.get("marks")
-                feedback = first_review.get("feedback")
-        
-        submission = {
-            **sub,
-            "student_name": sub.get("users", {}).get("name") if sub.get("users") else None,
-            "assignment_title": sub.get("assignments", {}).get("title") if sub.get("assignments") else None,
-            "marks": marks,
-            "feedback": feedback,
-        }
-        submissions.append(submission)
+    submissions = [shape_submission(sub) for sub in result.data]
     
+    if settings.TRUSTED_SERIALIZATION:
+        # Rows come straight from the database, skip re-validating each one
+        return ORJSONResponse([project_submission(sub) for sub in submissions])
     return submissions
 
 
@@ -161,11 +244,4 @@ def get_submission(
             detail="Submission not found"
         )
     
-    sub = result.data[0]
-    return {
-        **sub,
-        "student_name": sub.get("users", {}).get("name") if sub.get("users") else None,
-        "assignment_title": sub.get("assignments", {}).get("title") if sub.get("assignments") else None,
-        "marks": sub.get("reviews", [{}])[0].get("marks") if sub.get("reviews") else None,
-        "feedback": sub.get("reviews", [{}])[0].get("feedback") if sub.get("reviews") else None,
-    }
+    return shape_submission(result.data[0])
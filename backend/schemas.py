@@ -3,7 +3,7 @@ Pydantic schemas for API request/response validation
 """
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
 
@@ -87,6 +87,8 @@ class SubmissionResponse(SubmissionBase):
     student_id: int
     file_path: str
     file_type: str
+    content_hash: Optional[str] = None
+    original_filename: Optional[str] = None
     submitted_at: datetime
     status: SubmissionStatus
 
@@ -119,3 +121,15 @@ class ReviewResponse(ReviewBase):
 
     class Config:
         from_attributes = True
+
+
+class ReviewBulkRequest(BaseModel):
+    reviews: List[ReviewCreate]
+
+
+class ReviewBulkResult(BaseModel):
+    row: int
+    submission_id: Optional[int] = None
+    success: bool
+    review_id: Optional[int] = None
+    error: Optional[str] = None
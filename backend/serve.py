@@ -0,0 +1,101 @@
+"""
+Assignment Platform - Production Server
+
+Runs the FastAPI app under gunicorn with uvicorn workers:
+- the app and the preview renderers are imported once in the master
+  (preload) and shared by every forked worker
+- each worker creates its own Supabase client in the app lifespan
+- SIGTERM stops accepting connections and lets in-flight requests such as
+  uploads finish for up to GRACEFUL_TIMEOUT seconds
+- workers are recycled after MAX_REQUESTS (+ jitter) requests
+
+Usage:
+    python serve.py
+"""
+import logging
+import multiprocessing
+
+from gunicorn.app.base import BaseApplication
+
+from config import get_settings
+from utils.logging_setup import configure_logging, open_log_file, route_uvicorn_loggers
+
+settings = get_settings()
+logger = logging.getLogger("serve")
+
+
+def worker_count() -> int:
+    """
+    Number of workers to run, WORKERS or 2 x CPU cores + 1
+    
+    Version counters, idempotency keys and concurrency slots live in the
+    cache backend. With CACHE_BACKEND=memory each worker would have its own
+    copy (stale 304s, replayed writes), so that backend runs one worker.
+    """
+    if settings.CACHE_BACKEND == "memory":
+        if settings.WORKERS > 1:
+            raise SystemExit(
+                f"WORKERS={settings.WORKERS} requires CACHE_BACKEND=redis: with the memory "
+                "backend, caches, version counters and idempotency keys are per worker."
+            )
+        return 1
+    return settings.WORKERS or multiprocessing.cpu_count() * 2 + 1
+
+
+def post_fork(server, worker):
+    """Gunicorn hook: runs in each worker right after it is forked"""
+    # The uvicorn worker points uvicorn's loggers at gunicorn's handlers
+    route_uvicorn_loggers()
+    server.log.info(f"Worker {worker.pid} started")
+
+
+def worker_exit(server, worker):
+    """Gunicorn hook: runs in each worker after it has drained"""
+    server.log.info(f"Worker {worker.pid} exited")
+
+
+class ProductionServer(BaseApplication):
+    """Gunicorn application that preloads and warms the app before forking"""
+    
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+    
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+    
+    def load(self):
+        from main import app
+        from services import file_preview
+        
+        # Import the heavy modules once in the master; workers inherit them
+        import supabase  # noqa: F401
+        file_preview.warm_up()
+        return app
+
+
+def main():
+    configure_logging()
+    # Opened before the workers are forked, so they all append to the same file
+    open_log_file()
+    workers = worker_count()
+    if workers == 1 and settings.CACHE_BACKEND == "memory" and not settings.WORKERS:
+        logger.info("CACHE_BACKEND=memory: running a single worker. Set CACHE_BACKEND=redis to run more.")
+    
+    ProductionServer({
+        "bind": settings.BIND,
+        "workers": workers,
+        "worker_class": "uvicorn_worker.UvicornWorker",
+        "preload_app": True,
+        "graceful_timeout": settings.GRACEFUL_TIMEOUT,
+        "timeout": settings.WORKER_TIMEOUT,
+        "max_requests": settings.MAX_REQUESTS,
+        "max_requests_jitter": settings.MAX_REQUESTS_JITTER,
+        "post_fork": post_fork,
+        "worker_exit": worker_exit,
+    }).run()
+
+
+if __name__ == "__main__":
+    main()
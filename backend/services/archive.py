@@ -0,0 +1,91 @@
+"""
+Archive Service - Stream ZIP archives without buffering whole files
+"""
+import io
+import os
+import zipfile
+from typing import Iterable, Iterator, Tuple
+
+from config import get_settings
+from services.storage import storage
+
+settings = get_settings()
+
+
+class _ZipSink(io.RawIOBase):
+    """
+    Write-only, non-seekable target for ZipFile
+    
+    Because it cannot seek, ZipFile writes sizes and CRCs in data
+    descriptors after each entry instead of going back to patch headers.
+    """
+    
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def drain(self) -> bytes:
+        """Return and forget everything written so far"""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(entries: Iterable[Tuple[str, str]]) -> Iterator[bytes]:
+    """
+    Build a ZIP archive on the fly
+    
+    Entries are stored without compression (submissions are PDF/DOCX/PPTX,
+    which are already compressed) and read in ARCHIVE_CHUNK_SIZE pieces, so
+    memory use does not depend on file sizes.
+    
+    Args:
+        entries: (name inside the archive, storage key) pairs
+    
+    Yields:
+        bytes: Archive data
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for arcname, key in entries:
+            stat = storage.stat(key)
+            if stat is None:
+                continue
+            info = zipfile.ZipInfo(arcname, date_time=stat.modified.timetuple()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            info.file_size = stat.size
+            
+            with archive.open(info, mode="w", force_zip64=stat.size > zipfile.ZIP64_LIMIT) as target:
+                for chunk in storage.iter_range(key, chunk_size=settings.ARCHIVE_CHUNK_SIZE):
+                    target.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+    
+    # Central directory
+    yield sink.drain()
+
+
+def archive_name(student_name: str, original_name: str, used: set) -> str:
+    """Build a unique `student_name/original_name` entry name"""
+    folder = (student_name or "Unknown").replace("/", "_").replace("\\", "_").strip() or "Unknown"
+    filename = os.path.basename(original_name.replace("\\", "/")) or "file"
+    name = f"{folder}/{filename}"
+    
+    stem, ext = os.path.splitext(filename)
+    counter = 2
+    while name in used:
+        name = f"{folder}/{stem} ({counter}){ext}"
+        counter += 1
+    used.add(name)
+    return name
@@ -0,0 +1,189 @@
+"""
+Blob Service - Content-addressed, deduplicated upload storage
+"""
+import hashlib
+import logging
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Optional, Tuple
+
+from config import get_settings
+from database import get_db
+from services.storage import storage
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+BLOB_PREFIX = "blobs"
+
+# Keys of uploads stored before content hashing, which embed the uploaded
+# filename: {uuid4}_{name} from this service, {user_id}_{assignment_id}_{uuid8}_{name}
+# from the Streamlit app
+LEGACY_UPLOAD_NAME = re.compile(r"^(?:[0-9a-f]{8}-[0-9a-f-]{27}|\d+_\d+_[0-9a-f]{8})_(.+)$")
+
+# How often an upload checks whether garbage collection has let go of a blob
+GC_WAIT_INTERVAL = 0.2
+
+
+def blob_key(content_hash: str) -> str:
+    """Storage key of a blob, sharded by the first two hash bytes (blobs/ab/cd/abcd...)"""
+    return f"{BLOB_PREFIX}/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}"
+
+
+def hash_file(source: BinaryIO) -> Tuple[str, int]:
+    """SHA-256 and size of a seekable file, leaving it rewound"""
+    digest = hashlib.sha256()
+    size = 0
+    source.seek(0)
+    while True:
+        chunk = source.read(settings.STORAGE_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    source.seek(0)
+    return digest.hexdigest(), size
+
+
+def store_blob(
+    source: BinaryIO,
+    content_type: Optional[str] = None,
+    content_hash: Optional[str] = None
+) -> Tuple[str, str]:
+    """
+    Store a file once per content hash
+
+    If a blob with the same hash already exists nothing is written. The
+    blobs row is created (or its last_uploaded_at refreshed) before the
+    caller inserts the submission that references it; the ref_count
+    trigger on submissions does the counting. If garbage collection is
+    deleting the blob's file, the upload waits for it and writes the file.
+
+    Args:
+        source: Seekable file to store
+        content_type: MIME type saved with the object
+        content_hash: SHA-256 of source from hash_file, if the caller already has it
+
+    Returns:
+        tuple: (content hash, storage key)
+    """
+    if content_hash is None:
+        content_hash, size = hash_file(source)
+    else:
+        source.seek(0, os.SEEK_END)
+        size = source.tell()
+        source.seek(0)
+    key = blob_key(content_hash)
+
+    db = get_db()
+    # Refreshing last_uploaded_at keeps garbage collection away from this
+    # blob until the submission row referencing it exists
+    result = db.table("blobs").upsert({
+        "sha256": content_hash,
+        "size_bytes": size,
+        "last_uploaded_at": datetime.now(timezone.utc).isoformat()
+    }, on_conflict="sha256").execute()
+
+    # Claimed before the refresh above: the file may be deleted at any moment
+    if result.data and result.data[0].get("gc_started_at"):
+        _wait_for_gc(content_hash)
+        storage.save(key, source, content_type)
+        return content_hash, key
+
+    existing = storage.stat(key)
+    if existing is None or existing.size != size:
+        storage.save(key, source, content_type)
+    else:
+        logger.info("Reusing stored blob", extra={"content_hash": content_hash})
+
+    return content_hash, key
+
+
+def _wait_for_gc(content_hash: str):
+    """Wait until garbage collection has released its claim on a blob (or the claim has expired)"""
+    db = get_db()
+    deadline = time.monotonic() + settings.BLOB_GC_LEASE_SECONDS
+    while time.monotonic() < deadline:
+        rows = db.table("blobs").select("gc_started_at").eq("sha256", content_hash).execute().data
+        if not rows or rows[0].get("gc_started_at") is None:
+            return
+        time.sleep(GC_WAIT_INTERVAL)
+
+    # The collector died holding the claim; take the blob back
+    logger.warning("Blob garbage collection claim expired", extra={"content_hash": content_hash})
+    db.table("blobs").update({"gc_started_at": None}).eq("sha256", content_hash).execute()
+
+
+def verify_blob(content_hash: str) -> bool:
+    """Re-hash a stored blob and compare it with its name (integrity check)"""
+    key = blob_key(content_hash)
+    if storage.stat(key) is None:
+        return False
+    digest = hashlib.sha256()
+    for chunk in storage.iter_range(key):
+        digest.update(chunk)
+    return digest.hexdigest() == content_hash
+
+
+def collect_garbage() -> int:
+    """
+    Delete blobs no submission has referenced for BLOB_GC_GRACE_SECONDS
+
+    Each blob is claimed (gc_started_at) before its file is deleted, and
+    the row is removed or the claim cleared afterwards. An upload of the
+    same content that lands in between sees the claim, waits for it to
+    clear and then writes the file again, so it never keeps a reference to
+    a file that is being deleted.
+
+    Returns:
+        int: Number of blobs removed
+    """
+    db = get_db()
+    now = datetime.now(timezone.utc)
+    cutoff = (now - timedelta(seconds=settings.BLOB_GC_GRACE_SECONDS)).isoformat()
+    lease_cutoff = (now - timedelta(seconds=settings.BLOB_GC_LEASE_SECONDS)).isoformat()
+
+    result = db.table("blobs").select("sha256").eq("ref_count", 0).lt("last_uploaded_at", cutoff).execute()
+
+    removed = 0
+    for row in result.data or []:
+        content_hash = row["sha256"]
+        # Re-check the conditions in the claim so a blob that was re-uploaded
+        # or referenced in the meantime is kept (expired claims are taken over)
+        claimed_at = datetime.now(timezone.utc).isoformat()
+        claimed = db.table("blobs").update({"gc_started_at": claimed_at}).eq("sha256", content_hash).eq(
+            "ref_count", 0
+        ).lt("last_uploaded_at", cutoff).or_(
+            f'gc_started_at.is.null,gc_started_at.lt."{lease_cutoff}"'
+        ).execute()
+        if not claimed.data:
+            continue
+
+        storage.delete(blob_key(content_hash))
+
+        # Drop the row unless an upload refreshed it meanwhile; either way the
+        # claim ends here, which lets a waiting upload rewrite the file
+        deleted = db.table("blobs").delete().eq("sha256", content_hash).eq("gc_started_at", claimed_at).eq(
+            "ref_count", 0
+        ).lt("last_uploaded_at", cutoff).execute()
+        if deleted.data:
+            removed += 1
+        else:
+            db.table("blobs").update({"gc_started_at": None}).eq("sha256", content_hash).eq(
+                "gc_started_at", claimed_at
+            ).execute()
+
+    if removed:
+        logger.info("Removed unreferenced blobs", extra={"count": removed})
+    return removed
+
+
+def original_filename(submission: dict) -> str:
+    """Filename the student uploaded (rows from before the original_filename column embed it in file_path)"""
+    if submission.get("original_filename"):
+        return submission["original_filename"]
+    file_path = submission["file_path"]
+    match = LEGACY_UPLOAD_NAME.match(file_path.rsplit("/", 1)[-1])
+    return match.group(1) if match else file_path
@@ -0,0 +1,281 @@
+"""
+Cache Service - Read-through application cache with pluggable backends
+"""
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable, Iterable, List
+
+from config import get_settings
+
+settings = get_settings()
+
+
+# ============ Backends ============
+class CacheBackend(ABC):
+    """Byte-level key/value store used by AppCache"""
+
+    name = "base"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self.get(key) for key in keys]
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def add(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        """Set a key only if it does not exist, returns True if it was set"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def incr(self, key: str, ttl: Optional[int] = None) -> int:
+        """Increment a counter, (re)starting its TTL if one is given"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def decr(self, key: str) -> int:
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU cache with per-entry TTL"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._get_unlocked(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        with self._lock:
+            self._set_unlocked(key, value, time.monotonic() + ttl if ttl else None)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def add(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        with self._lock:
+            if self._get_unlocked(key) is not None:
+                return False
+            self._set_unlocked(key, value, time.monotonic() + ttl if ttl else None)
+            return True
+
+    def incr(self, key: str, ttl: Optional[int] = None) -> int:
+        return self._add_to(key, 1, ttl)
+
+    def decr(self, key: str) -> int:
+        return self._add_to(key, -1, None)
+
+    def _add_to(self, key: str, amount: int, ttl: Optional[int]) -> int:
+        with self._lock:
+            current = self._get_unlocked(key)
+            expires_at = self._entries[key][1] if current is not None else None
+            if ttl:
+                expires_at = time.monotonic() + ttl
+            value = int(current or b"0") + amount
+            self._set_unlocked(key, str(value).encode(), expires_at)
+            return value
+
+    def _get_unlocked(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    def _set_unlocked(self, key: str, value: bytes, expires_at: Optional[float]):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Shared cache for multi-node deployments, spoken over the Redis protocol
+
+    Pass `client` to use an existing connection, e.g. a fakeredis instance or a
+    client pointed at a local Redis/Valkey container.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str = "", client=None, prefix: str = "ap:"):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        return self.client.mget([self.prefix + key for key in keys])
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def add(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        return bool(self.client.set(self.prefix + key, value, ex=ttl, nx=True))
+
+    def incr(self, key: str, ttl: Optional[int] = None) -> int:
+        if not ttl:
+            return int(self.client.incr(self.prefix + key))
+        pipe = self.client.pipeline()
+        pipe.incr(self.prefix + key)
+        pipe.expire(self.prefix + key, ttl)
+        return int(pipe.execute()[0])
+
+    def decr(self, key: str) -> int:
+        return int(self.client.decr(self.prefix + key))
+
+
+# ============ Read-through cache ============
+class AppCache:
+    """
+    Read-through cache for JSON-serializable database rows
+
+    Entries live in namespaces (e.g. "assignments"). Invalidating a namespace
+    bumps its generation number, which is part of every key, so all of its
+    entries are dropped at once on every node sharing the backend.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._hits = 0
+        self._misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get_or_load(self, namespace: str, key: str, loader: Callable[[], Any]) -> Any:
+        """Return a cached value, calling loader on a miss. None results are not cached."""
+        full_key = self._key(namespace, key)
+        cached = self.backend.get(full_key)
+        if cached is not None:
+            self._record(hits=1)
+            return json.loads(cached)
+
+        self._record(misses=1)
+        value = loader()
+        if value is not None:
+            self.backend.set(full_key, self._dumps(value), self.ttl_seconds)
+        return value
+
+    def get_many_or_load(
+        self,
+        namespace: str,
+        prefix: str,
+        ids: Iterable[Any],
+        loader: Callable[[List[Any]], Dict[Any, Any]]
+    ) -> Dict[Any, Any]:
+        """
+        Batched get_or_load for keys of the form "{prefix}:{id}"
+
+        Args:
+            ids: IDs to look up
+            loader: Called once with the missing IDs, returns {id: value}
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        generation = self._generation(namespace)
+        full_keys = [f"{namespace}:{generation}:{prefix}:{i}" for i in ids]
+
+        values = {}
+        missing = []
+        for i, cached in zip(ids, self.backend.get_many(full_keys)):
+            if cached is None:
+                missing.append(i)
+            else:
+                values[i] = json.loads(cached)
+        self._record(hits=len(values), misses=len(missing))
+
+        if missing:
+            loaded = loader(missing)
+            for i, value in loaded.items():
+                if value is not None:
+                    self.backend.set(f"{namespace}:{generation}:{prefix}:{i}", self._dumps(value), self.ttl_seconds)
+            values.update(loaded)
+        return values
+
+    def invalidate(self, namespace: str):
+        """Drop every entry in a namespace"""
+        self.backend.incr(f"gen:{namespace}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process"""
+        with self._stats_lock:
+            hits, misses = self._hits, self._misses
+        total = hits + misses
+        return {
+            "backend": self.backend.name,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else None,
+        }
+
+    def _generation(self, namespace: str) -> int:
+        generation = self.backend.get(f"gen:{namespace}")
+        return int(generation) if generation else 0
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{namespace}:{self._generation(namespace)}:{key}"
+
+    def _record(self, hits: int = 0, misses: int = 0):
+        with self._stats_lock:
+            self._hits += hits
+            self._misses += misses
+
+    @staticmethod
+    def _dumps(value: Any) -> bytes:
+        return json.dumps(value, default=str).encode("utf-8")
+
+
+def create_backend(backend_name: str, max_entries: int = None, prefix: str = "ap:") -> CacheBackend:
+    """Build the cache backend named by CACHE_BACKEND"""
+    if backend_name == "redis":
+        return RedisBackend(settings.REDIS_URL, prefix=prefix)
+    if backend_name == "memory":
+        return MemoryBackend(max_entries or settings.CACHE_MAX_ENTRIES)
+    raise ValueError(f"Unsupported cache backend: {backend_name}")
+
+
+app_cache = AppCache(create_backend(settings.CACHE_BACKEND), settings.CACHE_TTL_SECONDS)
+
+# Small shared state (version counters, concurrency slots, idempotency keys).
+# Kept apart from the LRU so cached rows can never evict it. It must be
+# shared by all workers, so serve.py runs several only with CACHE_BACKEND=redis.
+state_backend = create_backend(settings.CACHE_BACKEND, max_entries=1_000_000, prefix="ap:state:")
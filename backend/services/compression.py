@@ -0,0 +1,181 @@
+"""
+Compression Service - Negotiated gzip/brotli response compression
+"""
+import gzip
+import zlib
+from typing import Optional, List, Dict
+
+from config import get_settings
+
+try:
+    import brotli
+except ImportError:
+    # Brotli is optional; gzip is always available
+    brotli = None
+
+settings = get_settings()
+
+
+def available_encodings() -> List[str]:
+    """Encodings this server can produce, most preferred first"""
+    return ["br", "gzip"] if brotli else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the best encoding the client accepts
+
+    Args:
+        accept_encoding: Value of the Accept-Encoding request header
+
+    Returns:
+        "br", "gzip" or None for an uncompressed response
+    """
+    if not accept_encoding:
+        return None
+
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    best = None
+    best_quality = 0.0
+    for encoding in available_encodings():
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """Check a Content-Type against the allowlist (PDF, PNG etc. are already compressed)"""
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type in settings.COMPRESSIBLE_CONTENT_TYPES
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress a complete body"""
+    if encoding == "br":
+        return brotli.compress(data, quality=settings.BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=settings.GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class _StreamCompressor:
+    """Incremental compressor for streamed bodies"""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+            self._process = self._compressor.process
+            self._flush = self._compressor.flush
+            self._finish = self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._process = self._compressor.compress
+            self._flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._compressor.flush
+
+    def chunk(self, data: bytes) -> bytes:
+        # Flush each chunk so streamed responses still arrive incrementally
+        return self._process(data) + self._flush()
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with gzip or brotli
+
+    Only allowlisted content types are compressed. Complete bodies smaller
+    than COMPRESSION_MIN_SIZE are sent as-is, and responses that already
+    carry a Content-Encoding (e.g. pre-compressed previews) pass through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict((k.lower(), v) for k, v in scope.get("headers", []))
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                response_headers = dict((k.lower(), v) for k, v in start_message.get("headers", []))
+                content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+                if (
+                    b"content-encoding" in response_headers
+                    or not is_compressible(content_type)
+                    or (not more_body and len(body) < settings.COMPRESSION_MIN_SIZE)
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                raw_headers = [
+                    (k, v) for k, v in start_message.get("headers", [])
+                    if k.lower() not in (b"content-length", b"vary")
+                ]
+                vary = response_headers.get(b"vary")
+                raw_headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+                raw_headers.append((b"content-encoding", encoding.encode("latin-1")))
+
+                if not more_body:
+                    # Complete body: compress in one go and send a Content-Length
+                    compressed = compress(body, encoding)
+                    raw_headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+                    await send({**start_message, "headers": raw_headers})
+                    await send({"type": "http.response.body", "body": compressed})
+                    passthrough = True
+                    return
+
+                compressor = _StreamCompressor(encoding)
+                await send({**start_message, "headers": raw_headers})
+
+            data = compressor.chunk(body) if body else b""
+            if not more_body:
+                data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+        # Response without a body message (e.g. 304)
+        if start_message is not None and compressor is None and not passthrough:
+            await send(start_message)
@@ -1,17 +1,62 @@
 """
 File Preview Service - Convert documents for web viewing
 """
-import os
 import io
-from typing import Optional, Dict, Any
+import time
+import hashlib
+import logging
+import importlib
+from typing import Optional, Dict, Any, Tuple
 
+from config import get_settings
+from services.cache import create_backend
+from services.compression import available_encodings, compress, is_compressible
+from services.storage import storage
 
-def get_file_preview(file_path: str, file_type: str, page: Optional[int] = None) -> bytes:
+settings = get_settings()
+
+# Rendered previews, one entry per encoding variant
+preview_cache = create_backend(
+    settings.CACHE_BACKEND,
+    max_entries=settings.PREVIEW_CACHE_MAX_ENTRIES,
+    prefix="ap:preview:"
+)
+
+# File types whose preview is rendered (PDFs are served as-is)
+RENDERED_TYPES = ["docx", "pptx", "ppt"]
+
+# Renderer libraries, imported lazily by the preview functions
+RENDERER_MODULES = ["docx", "pptx", "PIL.Image", "PIL.ImageDraw", "PyPDF2"]
+
+logger = logging.getLogger(__name__)
+
+# Module name -> import time in seconds (None if not installed)
+import_timings: Dict[str, Optional[float]] = {}
+
+
+def warm_up():
+    """
+    Import the renderer libraries ahead of the first preview request
+    
+    Run in a background thread after startup so neither app start nor the
+    first preview pays the import cost.
+    """
+    for name in RENDERER_MODULES:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            import_timings[name] = round(time.perf_counter() - start, 4)
+        except ImportError:
+            import_timings[name] = None
+    logger.info(f"Preview renderers warmed up: {import_timings}")
+
+
+def get_file_preview(data: bytes, file_type: str, page: Optional[int] = None) -> bytes:
     """
     Generate preview content for different file types
     
     Args:
-        file_path: Path to the file
+        data: File content
         file_type: Extension (pdf, docx, pptx, ppt)
         page: Optional page number for paginated content
     
@@ -19,15 +64,71 @@ def get_file_preview(file_path: str, file_type: str, page: Optional[int] = None)
         bytes: Preview content
     """
     if file_type == "pdf":
-        return _preview_pdf(file_path)
+        return _preview_pdf(data)
     elif file_type == "docx":
-        return _preview_docx(file_path)
+        return _preview_docx(data)
     elif file_type in ["pptx", "ppt"]:
-        return _preview_pptx(file_path, page)
+        return _preview_pptx(data, page)
     else:
         raise ValueError(f"Unsupported file type: {file_type}")
 
 
+def get_cached_preview(
+    storage_key: str,
+    file_type: str,
+    page: Optional[int] = None,
+    encoding: Optional[str] = None,
+    content_hash: Optional[str] = None
+) -> Tuple[bytes, Optional[str]]:
+    """
+    Get preview content through the preview cache
+    
+    Rendered previews are cached once per encoding, so compressible output
+    (DOCX HTML) is compressed when rendered rather than on every hit.
+    Content-addressed files are cached by hash, so identical uploads share
+    one preview and a hit needs no storage round trip.
+    
+    Args:
+        storage_key: Key of the file in storage
+        file_type: Extension (pdf, docx, pptx, ppt)
+        page: Optional page number for paginated content
+        encoding: Negotiated response encoding ("br", "gzip" or None)
+        content_hash: SHA-256 of the file, if known
+    
+    Returns:
+        tuple: (content, content encoding or None)
+    """
+    if file_type not in RENDERED_TYPES:
+        return get_file_preview(storage.read(storage_key), file_type, page), None
+    
+    compressible = is_compressible(get_preview_content_type(file_type))
+    if not compressible:
+        encoding = None
+    
+    if content_hash:
+        source = content_hash
+    else:
+        info = storage.stat(storage_key)
+        if info is None:
+            raise FileNotFoundError(storage_key)
+        source = f"{storage.name}|{storage_key}|{info.version}|{info.size}"
+    key = hashlib.sha256(f"{source}|{file_type}|{page or 1}".encode("utf-8")).hexdigest()
+    
+    cached = preview_cache.get(f"{key}:{encoding or 'identity'}")
+    if cached is not None:
+        return cached, encoding
+    
+    content = get_file_preview(storage.read(storage_key), file_type, page)
+    variants = {"identity": content}
+    if compressible:
+        for name in available_encodings():
+            variants[name] = compress(content, name)
+    for name, data in variants.items():
+        preview_cache.set(f"{key}:{name}", data, settings.PREVIEW_CACHE_TTL_SECONDS)
+    
+    return variants[encoding or "identity"], encoding
+
+
 def get_preview_content_type(file_type: str) -> str:
     """Get the content type for preview response"""
     content_types = {
@@ -39,33 +140,35 @@ def get_preview_content_type(file_type: str) -> str:
     return content_types.get(file_type, "application/octet-stream")
 
 
-def get_file_info(file_path: str, file_type: str) -> Dict[str, Any]:
+def get_file_info(storage_key: str, file_type: str) -> Dict[str, Any]:
     """Get file metadata for preview rendering"""
+    stat = storage.stat(storage_key)
     info = {
-        "size_bytes": os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        "size_bytes": stat.size if stat else 0
     }
+    if stat is None:
+        return info
     
     if file_type == "pdf":
-        info["page_count"] = _get_pdf_page_count(file_path)
+        info["page_count"] = _get_pdf_page_count(storage.read(storage_key))
     elif file_type in ["pptx", "ppt"]:
-        info["slide_count"] = _get_pptx_slide_count(file_path)
+        info["slide_count"] = _get_pptx_slide_count(storage.read(storage_key))
     
     return info
 
 
 # ============ PDF Preview ============
-def _preview_pdf(file_path: str) -> bytes:
+def _preview_pdf(data: bytes) -> bytes:
     """Return PDF file directly for iframe embedding"""
-    with open(file_path, "rb") as f:
-        return f.read()
+    return data
 
 
-def _get_pdf_page_count(file_path: str) -> int:
+def _get_pdf_page_count(data: bytes) -> int:
     """Get number of pages in PDF"""
     try:
         # Use PyPDF2 if available for page count
         from PyPDF2 import PdfReader
-        reader = PdfReader(file_path)
+        reader = PdfReader(io.BytesIO(data))
         return len(reader.pages)
     except ImportError:
         # Fallback: return -1 if PyPDF2 not installed
@@ -75,13 +178,13 @@ def _get_pdf_page_count(file_path: str) -> int:
 
 
 # ============ DOCX Preview ============
-def _preview_docx(file_path: str) -> bytes:
+def _preview_docx(data: bytes) -> bytes:
     """Convert DOCX to HTML for web display"""
     try:
         from docx import Document
         from docx.shared import Inches
         
-        doc = Document(file_path)
+        doc = Document(io.BytesIO(data))
         
         # Build HTML
         html_parts = [
@@ -137,13 +240,13 @@ def _preview_docx(file_path: str) -> bytes:
 
 
 # ============ PPTX Preview ============
-def _preview_pptx(file_path: str, page: Optional[int] = None) -> bytes:
+def _preview_pptx(data: bytes, page: Optional[int] = None) -> bytes:
     """Convert PPTX slide to image"""
     try:
         from pptx import Presentation
         from PIL import Image
         
-        prs = Presentation(file_path)
+        prs = Presentation(io.BytesIO(data))
         slide_idx = (page or 1) - 1
         
         if slide_idx < 0 or slide_idx >= len(prs.slides):
@@ -208,11 +311,11 @@ def _preview_pptx(file_path: str, page: Optional[int] = None) -> bytes:
         return buffer.read()
 
 
-def _get_pptx_slide_count(file_path: str) -> int:
+def _get_pptx_slide_count(data: bytes) -> int:
     """Get number of slides in PPTX"""
     try:
         from pptx import Presentation
-        prs = Presentation(file_path)
+        prs = Presentation(io.BytesIO(data))
         return len(prs.slides)
     except Exception:
         return -1
@@ -0,0 +1,87 @@
+"""
+Idempotency Service - Replay results of retried write requests
+"""
+import hashlib
+import json
+from typing import Optional, Dict, Any
+
+from config import get_settings
+from services.cache import CacheBackend, state_backend
+
+settings = get_settings()
+
+IN_FLIGHT = object()
+MISMATCH = object()
+
+
+class IdempotencyStore:
+    """
+    Remember the result of a write request under a client-supplied key
+    
+    Keys are scoped by user so two clients can never see each other's results.
+    Each key is stored with a fingerprint of the request it was first used
+    for, so reusing it for a different request is detected rather than
+    answered with the first result. Entries live on the shared state backend,
+    so a retry that lands on another worker still finds the original result,
+    and expire after ttl_seconds.
+    """
+    
+    def __init__(self, ttl_seconds: int, backend: CacheBackend = state_backend):
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+    
+    def begin(self, key: str, fingerprint: str) -> Optional[Any]:
+        """
+        Claim a key before doing the work
+        
+        Args:
+            key: Scoped key (see scoped_key)
+            fingerprint: request_fingerprint() of this request
+        
+        Returns:
+            None if the caller should proceed, the stored result if the
+            request already completed, IN_FLIGHT if another request holding
+            the same key is still running, or MISMATCH if the key was used
+            for a different request
+        """
+        if self.backend.add(self._key(key), self._dumps(fingerprint, None), self.ttl_seconds):
+            return None
+        stored = self.backend.get(self._key(key))
+        if stored is None:
+            # The other request just released it; treat as busy
+            return IN_FLIGHT
+        entry = json.loads(stored)
+        if entry.get("fingerprint") != fingerprint:
+            return MISMATCH
+        if entry.get("result") is None:
+            return IN_FLIGHT
+        return entry["result"]
+    
+    def complete(self, key: str, fingerprint: str, result: Dict[str, Any]):
+        """Store the final result for a claimed key"""
+        self.backend.set(self._key(key), self._dumps(fingerprint, result), self.ttl_seconds)
+    
+    def release(self, key: str):
+        """Forget a claimed key so the request can be retried after a failure"""
+        self.backend.delete(self._key(key))
+    
+    @staticmethod
+    def _key(key: str) -> str:
+        return f"idempotency:{key}"
+    
+    @staticmethod
+    def _dumps(fingerprint: str, result: Optional[Dict[str, Any]]) -> bytes:
+        return json.dumps({"fingerprint": fingerprint, "result": result}).encode("utf-8")
+
+
+idempotency_store = IdempotencyStore(settings.IDEMPOTENCY_TTL_SECONDS)
+
+
+def scoped_key(user_id: int, key: str) -> str:
+    """Build the store key for a user's Idempotency-Key header"""
+    return f"{user_id}:{key}"
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """Fingerprint of what a request asks for, e.g. (user ID, assignment ID, content hash)"""
+    return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()
@@ -0,0 +1,37 @@
+"""
+Limits Service - Per-user concurrency caps
+"""
+from services.cache import CacheBackend, state_backend
+
+
+class ConcurrencyLimiter:
+    """
+    Cap how many long-running operations a single user may have open at once
+    
+    Slots are counted on the shared state backend so the cap holds across
+    workers. Counters expire after slot_ttl seconds in case a worker dies
+    without releasing its slots.
+    """
+    
+    def __init__(self, name: str, max_per_user: int, slot_ttl: int = 60 * 60, backend: CacheBackend = state_backend):
+        self.name = name
+        self.max_per_user = max_per_user
+        self.slot_ttl = slot_ttl
+        self.backend = backend
+    
+    def acquire(self, user_id: int) -> bool:
+        """Take a slot for the user, returns False if the cap is reached"""
+        key = self._key(user_id)
+        if self.backend.incr(key, ttl=self.slot_ttl) > self.max_per_user:
+            self.backend.decr(key)
+            return False
+        return True
+    
+    def release(self, user_id: int):
+        """Give back a slot taken with acquire()"""
+        key = self._key(user_id)
+        if self.backend.decr(key) <= 0:
+            self.backend.delete(key)
+    
+    def _key(self, user_id: int) -> str:
+        return f"limit:{self.name}:{user_id}"
@@ -0,0 +1,261 @@
+"""
+Storage Service - Submitted files on local disk or S3-compatible object storage
+"""
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Optional, Iterator, BinaryIO, NamedTuple
+from urllib.parse import quote, urlencode
+
+from config import get_settings
+
+settings = get_settings()
+
+
+class ObjectInfo(NamedTuple):
+    """Metadata of a stored object"""
+    size: int
+    version: str  # changes whenever the content changes (mtime or ETag)
+    modified: datetime
+
+
+# ============ Backends ============
+class StorageBackend(ABC):
+    """Streaming key/value store for uploaded files"""
+
+    name = "base"
+
+    @abstractmethod
+    def save(self, key: str, source: BinaryIO, content_type: Optional[str] = None):
+        """Store everything readable from source under key, replacing any existing object"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def stat(self, key: str) -> Optional[ObjectInfo]:
+        """Object metadata, or None if the key does not exist"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_range(
+        self,
+        key: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        chunk_size: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """Yield bytes start..end (inclusive, None = to the end) in chunks"""
+        raise NotImplementedError
+
+    def read(self, key: str) -> bytes:
+        return b"".join(self.iter_range(key))
+
+    @abstractmethod
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def signed_url(self, key: str, expires_in: int, filename: Optional[str] = None) -> str:
+        """URL granting time-limited read access without an auth header"""
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    """
+    Files under a local directory (UPLOAD_DIR)
+
+    Signed URLs point at the API's /files/signed route, which checks an HMAC
+    of the key and expiry. Several backend nodes can share this backend only
+    if the directory is on shared storage.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def save(self, key: str, source: BinaryIO, content_type: Optional[str] = None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as target:
+                shutil.copyfileobj(source, target, settings.STORAGE_CHUNK_SIZE)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def stat(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            stat = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return ObjectInfo(
+            size=stat.st_size,
+            version=str(stat.st_mtime_ns),
+            modified=datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+        )
+
+    def iter_range(
+        self,
+        key: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        chunk_size: Optional[int] = None
+    ) -> Iterator[bytes]:
+        chunk_size = chunk_size or settings.STORAGE_CHUNK_SIZE
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def signed_url(self, key: str, expires_in: int, filename: Optional[str] = None) -> str:
+        expires = int(time.time()) + expires_in
+        params = {"expires": expires, "signature": sign_key(key, expires, filename)}
+        if filename:
+            params["filename"] = filename
+        return f"{settings.PUBLIC_API_URL}/files/signed/{quote(key)}?{urlencode(params)}"
+
+    def _path(self, key: str) -> str:
+        """Resolve a key inside root, rejecting keys that would escape it"""
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+
+class S3Storage(StorageBackend):
+    """
+    Objects in an S3-compatible bucket (AWS S3, MinIO, Supabase Storage's S3 endpoint)
+
+    Every backend node sees the same files, and signed URLs are S3
+    presigned URLs, so downloads need not pass through the API at all.
+    Pass `client` to use an existing boto3 client, e.g. one under moto.
+    """
+
+    name = "s3"
+
+    def __init__(self, bucket: str, client=None):
+        if client is None:
+            try:
+                import boto3
+            except ImportError:
+                raise RuntimeError("STORAGE_BACKEND=s3 requires the 'boto3' package")
+            client = boto3.client(
+                "s3",
+                endpoint_url=settings.S3_ENDPOINT_URL or None,
+                region_name=settings.S3_REGION,
+                aws_access_key_id=settings.S3_ACCESS_KEY_ID or None,
+                aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY or None
+            )
+        self.client = client
+        self.bucket = bucket
+
+    def save(self, key: str, source: BinaryIO, content_type: Optional[str] = None):
+        # upload_fileobj streams the source, switching to multipart for large files
+        extra_args = {"ContentType": content_type} if content_type else None
+        self.client.upload_fileobj(source, self.bucket, key, ExtraArgs=extra_args)
+
+    def stat(self, key: str) -> Optional[ObjectInfo]:
+        from botocore.exceptions import ClientError
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return ObjectInfo(size=head["ContentLength"], version=head["ETag"].strip('"'), modified=head["LastModified"])
+
+    def iter_range(
+        self,
+        key: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        chunk_size: Optional[int] = None
+    ) -> Iterator[bytes]:
+        params = {"Bucket": self.bucket, "Key": key}
+        if start or end is not None:
+            params["Range"] = f"bytes={start}-{'' if end is None else end}"
+        body = self.client.get_object(**params)["Body"]
+        try:
+            yield from body.iter_chunks(chunk_size or settings.STORAGE_CHUNK_SIZE)
+        finally:
+            body.close()
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def signed_url(self, key: str, expires_in: int, filename: Optional[str] = None) -> str:
+        params = {"Bucket": self.bucket, "Key": key}
+        if filename:
+            params["ResponseContentDisposition"] = content_disposition("attachment", filename)
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_in)
+
+
+# ============ Signed local URLs ============
+def sign_key(key: str, expires: int, filename: Optional[str] = None) -> str:
+    """HMAC of a key, expiry and download name, used by LocalStorage signed URLs"""
+    message = f"{key}|{expires}|{filename or ''}".encode("utf-8")
+    return hmac.new(settings.JWT_SECRET.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def verify_signature(key: str, expires: int, signature: str, filename: Optional[str] = None) -> bool:
+    """Check a signed URL's signature and expiry"""
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(sign_key(key, expires, filename), signature)
+
+
+# ============ Response headers ============
+def content_disposition(disposition_type: str, filename: Optional[str] = None) -> str:
+    """
+    Content-Disposition value for any filename (RFC 6266)
+
+    Gives an ASCII fallback in `filename` and the exact UTF-8 name in
+    `filename*`, so names with non-Latin-1 characters, quotes or
+    semicolons neither break the header nor fail to encode.
+
+    Args:
+        disposition_type: "attachment" or "inline"
+        filename: Name the client should save the file as
+    """
+    if not filename:
+        return disposition_type
+    decomposed = unicodedata.normalize("NFKD", filename)
+    fallback = "".join(
+        c if " " <= c <= "~" and c not in '"\\' else "_"
+        for c in decomposed
+        if not unicodedata.combining(c)
+    )
+    return f"{disposition_type}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def create_storage(backend_name: str) -> StorageBackend:
+    """Build the storage backend named by STORAGE_BACKEND"""
+    if backend_name == "s3":
+        return S3Storage(settings.S3_BUCKET)
+    if backend_name == "local":
+        return LocalStorage(settings.UPLOAD_DIR)
+    raise ValueError(f"Unsupported storage backend: {backend_name}")
+
+
+storage = create_storage(settings.STORAGE_BACKEND)
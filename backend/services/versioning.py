@@ -0,0 +1,53 @@
+"""
+Versioning Service - Table version counters and ETag helpers
+"""
+import hashlib
+import uuid
+from typing import Optional
+
+from services.cache import CacheBackend, state_backend
+
+
+class TableVersions:
+    """
+    Per-table version counters bumped by every write route
+    
+    Counters live on the shared state backend so every worker sees the same
+    version. The epoch is regenerated whenever the backend loses it (process
+    restart with the memory backend, Redis flush), so validators issued
+    before that never match afterwards.
+    """
+    
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+    
+    def get(self, table: str) -> str:
+        """Get the current version of a table"""
+        epoch, version = self.backend.get_many(["epoch", f"version:{table}"])
+        if epoch is None:
+            self.backend.add("epoch", uuid.uuid4().hex[:8].encode())
+            epoch, version = self.backend.get_many(["epoch", f"version:{table}"])
+        return f"{epoch.decode()}.{int(version or 0)}"
+    
+    def bump(self, table: str):
+        """Mark a table as changed"""
+        self.backend.incr(f"version:{table}")
+
+
+table_versions = TableVersions(state_backend)
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from a table version and the request parameters"""
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return any(c.removeprefix("W/") == etag for c in candidates)
@@ -0,0 +1,61 @@
+"""
+Smoke checks for the Redis cache backend and S3 storage, against in-process fakes
+
+Needs fakeredis and moto (pip install fakeredis moto). Run from the backend directory:
+    python test_backends.py
+"""
+import io
+import os
+from urllib.parse import urlsplit, parse_qs
+
+# moto never talks to AWS, but boto3 still wants credentials
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+try:
+    print("Testing RedisBackend...")
+    import fakeredis
+    from services.cache import RedisBackend
+    backend = RedisBackend(client=fakeredis.FakeRedis())
+
+    backend.set("a", b"1")
+    assert backend.get_many([]) == [], "get_many of no keys"
+    assert backend.get_many(["a", "missing"]) == [b"1", None], "get_many"
+    assert backend.add("b", b"x") is True, "add of a new key"
+    assert backend.add("b", b"y") is False, "add of an existing key"
+    assert backend.get("b") == b"x", "add must not overwrite"
+    assert backend.incr("n") == 1, "incr of a new key"
+    assert backend.incr("n", ttl=60) == 2, "incr with ttl"
+    assert 0 < backend.client.ttl("ap:n") <= 60, "incr ttl"
+    print("✅ RedisBackend get_many / add / incr")
+except Exception as e:
+    print(f"❌ RedisBackend error: {e!r}")
+
+try:
+    print("Testing S3Storage signed URLs...")
+    import boto3
+    import requests
+    from moto import mock_aws
+    from services.storage import S3Storage, content_disposition
+
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="submissions")
+        s3 = S3Storage("submissions", client=client)
+        s3.save("blobs/ab/cd/abcd", io.BytesIO(b"%PDF-1"), "application/pdf")
+        assert s3.stat("blobs/ab/cd/abcd").size == 6, "stat"
+
+        filename = "Résumé; \"final\".pdf"
+        url = s3.signed_url("blobs/ab/cd/abcd", 60, filename=filename)
+        query = parse_qs(urlsplit(url).query)
+        assert "Signature" in query or "X-Amz-Signature" in query, "URL is not presigned"
+        assert query["response-content-disposition"] == [content_disposition("attachment", filename)], "disposition"
+
+        # moto answers presigned URLs fetched with requests
+        response = requests.get(url)
+        assert response.status_code == 200, f"status {response.status_code}"
+        assert response.content == b"%PDF-1", "body"
+        assert response.headers["Content-Disposition"] == content_disposition("attachment", filename), "header"
+    print("✅ S3Storage signed URL")
+except Exception as e:
+    print(f"❌ S3Storage error: {e!r}")
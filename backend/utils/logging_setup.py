@@ -0,0 +1,276 @@
+"""
+Logging Setup - Non-blocking JSON logging with request IDs
+
+Handlers on the request path only put records on a bounded queue; a
+background listener thread formats them and writes to stderr, and to
+LOG_FILE once the server starts (open_log_file).
+When the queue is full records are dropped instead of blocking a request.
+Per-logger sampling and rate limiting keep error storms from flooding disk.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Dict
+
+from config import get_settings
+
+settings = get_settings()
+
+# ID of the request being handled, "-" outside a request
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else was passed via `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+# ============ Formatting ============
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, including fields passed via `extra`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+
+
+# ============ Filters ============
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request ID (runs in the caller's thread, before queueing)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class ThrottleFilter(logging.Filter):
+    """
+    Per-logger sampling and rate limiting
+
+    Records below WARNING are kept with the probability configured for
+    their logger in LOG_SAMPLE_RATES. Every logger then gets a token bucket
+    of LOG_RATE_LIMIT_PER_SECOND records (bursts up to LOG_RATE_LIMIT_BURST).
+    The number of records dropped by the bucket is reported on the next
+    record that gets through as `suppressed`.
+    """
+
+    def __init__(self, sample_rates: Dict[str, float], rate: float, burst: int):
+        super().__init__()
+        self.sample_rates = sample_rates
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, list] = {}  # logger -> [tokens, last refill, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            sample_rate = self.sample_rates.get(record.name, 1.0)
+            if sample_rate < 1.0 and random.random() >= sample_rate:
+                return False
+
+        if self.rate <= 0:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(record.name)
+            if bucket is None:
+                bucket = self._buckets[record.name] = [float(self.burst), now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+        return True
+
+
+# ============ Queue ============
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback now (args may not be picklable or
+        # may change later), but leave formatting to the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_listener_started = False
+_output_handlers = []
+_file_handler: Optional[logging.FileHandler] = None
+
+
+def configure_logging():
+    """
+    Route all logging through the background queue (call once at startup)
+
+    Also re-parents the uvicorn loggers so access and error logs share the
+    same format and request IDs.
+    """
+    global _queue_handler
+    if _queue_handler is not None:
+        return
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(_formatter())
+    _output_handlers.append(handler)
+
+    _queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    _queue_handler.addFilter(ThrottleFilter(
+        settings.LOG_SAMPLE_RATES,
+        settings.LOG_RATE_LIMIT_PER_SECOND,
+        settings.LOG_RATE_LIMIT_BURST
+    ))
+    _queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(settings.LOG_LEVEL)
+    route_uvicorn_loggers()
+
+    _start_listener()
+    # Listener threads do not survive fork (gunicorn preload): start a new one
+    os.register_at_fork(after_in_child=_restart_in_child)
+    atexit.register(_stop_listener)
+
+
+def open_log_file():
+    """
+    Also write logs to LOG_FILE (call when the server starts, not at import)
+
+    Importing the app (tests, benchmarks, tooling) must not create the file.
+    Calling this again is a no-op; workers forked afterwards inherit it.
+    """
+    global _file_handler
+    if _file_handler is not None or not settings.LOG_FILE or _queue_handler is None:
+        return
+    _file_handler = logging.FileHandler(settings.LOG_FILE)
+    _file_handler.setFormatter(_formatter())
+    _output_handlers.append(_file_handler)
+    if _listener is not None:
+        _listener.handlers = tuple(_output_handlers)
+
+
+def _formatter() -> logging.Formatter:
+    return JSONFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+
+
+def route_uvicorn_loggers():
+    """Send uvicorn's loggers to the root handler (uvicorn and gunicorn attach their own)"""
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+
+def dropped_records() -> int:
+    """Records dropped because the queue was full (this process)"""
+    return _queue_handler.dropped if _queue_handler else 0
+
+
+def _start_listener():
+    global _listener, _listener_started
+    _listener = QueueListener(_queue_handler.queue, *_output_handlers, respect_handler_level=True)
+    _listener.start()
+    _listener_started = True
+
+
+def _restart_in_child():
+    # The parent's queue may hold records or a lock taken by its listener
+    _queue_handler.queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _queue_handler.dropped = 0
+    _start_listener()
+
+
+def _stop_listener():
+    """Flush what is queued and stop the listener thread"""
+    global _listener_started
+    if _listener is None or not _listener_started:
+        return
+    _listener_started = False
+    try:
+        _listener.stop()
+    except queue.Full:
+        # No room for the stop marker; the daemon thread ends with the process
+        pass
+
+
+# ============ Middleware ============
+class RequestIdMiddleware:
+    """
+    ASGI middleware assigning each request an ID
+
+    Uses the caller's X-Request-ID if it sends one (e.g. from a proxy),
+    otherwise generates one, and echoes it on the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope.get("headers", []):
+            if key.lower() == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        # Each request runs in its own task, so the value does not leak into
+        # other requests; it is left set for the global exception handler
+        request_id_var.set(request_id)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,15 @@
+"""
+Response Utilities - Fast JSON rendering for large payloads
+"""
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (several times faster than json.dumps)"""
+    
+    def render(self, content: Any) -> bytes:
+        # UTC datetimes end in "Z", as Pydantic renders them
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
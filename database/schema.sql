@@ -25,6 +25,23 @@ CREATE TABLE IF NOT EXISTS assignments (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- ============ Blobs Table ============
+-- Uploaded files, stored once per SHA-256 of their content
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 CHAR(64) PRIMARY KEY,
+    size_bytes BIGINT NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 0 CHECK (ref_count >= 0),
+    last_uploaded_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Unreferenced blobs, for garbage collection
+CREATE INDEX IF NOT EXISTS idx_blobs_unreferenced ON blobs(last_uploaded_at) WHERE ref_count = 0;
+
+-- Set while garbage collection deletes the blob's file; uploads of the same
+-- content wait for it to clear before they reuse or rewrite the file
+ALTER TABLE blobs ADD COLUMN IF NOT EXISTS gc_started_at TIMESTAMP WITH TIME ZONE;
+
 -- ============ Submissions Table ============
 CREATE TABLE IF NOT EXISTS submissions (
     id SERIAL PRIMARY KEY,
@@ -32,6 +49,8 @@ CREATE TABLE IF NOT EXISTS submissions (
     student_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     file_path VARCHAR(500) NOT NULL,
     file_type VARCHAR(20) NOT NULL,
+    content_hash CHAR(64) REFERENCES blobs(sha256),
+    original_filename VARCHAR(500),
     submitted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     status VARCHAR(20) DEFAULT 'pending' CHECK (status IN ('pending', 'reviewed')),
     
@@ -44,6 +63,29 @@ CREATE INDEX IF NOT EXISTS idx_submissions_student ON submissions(student_id);
 CREATE INDEX IF NOT EXISTS idx_submissions_assignment ON submissions(assignment_id);
 CREATE INDEX IF NOT EXISTS idx_submissions_status ON submissions(status);
 
+-- Content-addressed uploads on databases created before the blobs table
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS content_hash CHAR(64) REFERENCES blobs(sha256);
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS original_filename VARCHAR(500);
+CREATE INDEX IF NOT EXISTS idx_submissions_content_hash ON submissions(content_hash);
+
+-- Keep blobs.ref_count in step with the submissions pointing at each blob
+CREATE OR REPLACE FUNCTION update_blob_ref_count() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.content_hash IS NOT NULL THEN
+        UPDATE blobs SET ref_count = ref_count - 1 WHERE sha256 = OLD.content_hash;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.content_hash IS NOT NULL THEN
+        UPDATE blobs SET ref_count = ref_count + 1 WHERE sha256 = NEW.content_hash;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS submissions_blob_ref_count ON submissions;
+CREATE TRIGGER submissions_blob_ref_count
+    AFTER INSERT OR DELETE OR UPDATE OF content_hash ON submissions
+    FOR EACH ROW EXECUTE FUNCTION update_blob_ref_count();
+
 -- ============ Reviews Table ============
 CREATE TABLE IF NOT EXISTS reviews (
     id SERIAL PRIMARY KEY,
@@ -66,6 +108,7 @@ ALTER TABLE users ENABLE ROW LEVEL SECURITY;
 ALTER TABLE assignments ENABLE ROW LEVEL SECURITY;
 ALTER TABLE submissions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE reviews ENABLE ROW LEVEL SECURITY;
+ALTER TABLE blobs ENABLE ROW LEVEL SECURITY;
 
 -- Policies (adjust based on your security needs)
 -- For now, allow service role full access
@@ -89,6 +132,11 @@ CREATE POLICY "Service role has full access to reviews"
     USING (true)
     WITH CHECK (true);
 
+CREATE POLICY "Service role has full access to blobs"
+    ON blobs FOR ALL
+    USING (true)
+    WITH CHECK (true);
+
 -- ============ Sample Data (Optional) ============
 -- Uncomment to insert sample admin user (password: admin123)
 -- INSERT INTO users (email, password_hash, name, role) 
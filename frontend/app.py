@@ -4,9 +4,8 @@ Assignment Platform - Main Streamlit App
 import streamlit as st
 from components.auth import show_auth_page, require_auth
 from components.sidebar import render_sidebar
-from utils.session import get_cookie, get_manager
+from utils.session import get_manager, restore_session
 from utils.supabase_api import api
-import time
 
 # Initialize cookie manager (must be done at top level)
 cookie_manager = get_manager()
@@ -65,24 +64,8 @@ if "token" not in st.session_state:
 if "user" not in st.session_state:
     st.session_state.user = None
 
-# Attempt to restore session from cookie
-if not st.session_state.token:
-    token_cookie = get_cookie("token")
-    if token_cookie:
-        st.session_state.token = token_cookie
-        # Validate token and get user using token decoding
-        from utils.supabase_api import decode_token
-        token_data = decode_token(token_cookie)
-        if token_data:
-            # Fetch user from database
-            user = api.get_user(token_data["user_id"])
-            if "error" not in user:
-                st.session_state.user = user
-                st.rerun()
-            else:
-                st.session_state.token = None
-        else:
-            st.session_state.token = None
+# Restore session from cookie (no rerun needed)
+restore_session()
 
 # Check authentication
 if not require_auth():
@@ -123,8 +106,9 @@ else:
     
     col1, col2, col3 = st.columns(3)
     
-    assignments = api.list_assignments()
-    submissions = api.list_submissions()
+    store = api.get_store()
+    assignments = store.assignments
+    submissions = store.submissions
     
     with col1:
         st.metric("Total Assignments", len(assignments))
@@ -136,9 +120,9 @@ else:
             st.metric("My Submissions", len(submissions))
     
     with col3:
-        reviewed = [s for s in submissions if s.get("status") == "reviewed"]
+        reviewed = store.count(status="reviewed")
         if role == "admin":
-            st.metric("Reviewed", len(reviewed))
+            st.metric("Reviewed", reviewed)
         else:
-            pending = len(submissions) - len(reviewed)
+            pending = len(submissions) - reviewed
             st.metric("Pending Review", pending)
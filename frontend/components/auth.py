@@ -28,6 +28,7 @@ def show_login_form():
                 st.session_state.token = result["access_token"]
                 # User is returned directly from login
                 st.session_state.user = result["user"]
+                st.session_state.logged_out = False
                 # Persist session
                 set_cookie("token", result["access_token"])
                 st.success("Login successful!")
@@ -86,6 +87,7 @@ def logout():
     """Clear session and logout"""
     st.session_state.token = None
     st.session_state.user = None
+    st.session_state.logged_out = True
     delete_cookie("token")
     st.rerun()
 
@@ -5,144 +5,67 @@ import streamlit as st
 import streamlit.components.v1 as components
 import requests
 import base64
+import json
+from typing import Optional
 from utils.supabase_api import api
 
+# PDF.js requests the file in ranges of this size
+PDF_RANGE_CHUNK_SIZE = 64 * 1024
 
-def show_file_preview(submission_id: int, file_type: str, height: int = 600):
+# Inline fallback: PDFs up to this size are fetched by the app, at most this many kept
+PDF_INLINE_MAX_BYTES = 10 * 1024 * 1024
+PDF_INLINE_CACHE_ENTRIES = 8
+
+
+@st.fragment
+def show_file_preview(
+    submission_id: int,
+    file_type: str,
+    height: int = 600,
+    file_url: Optional[str] = None,
+    file_path: Optional[str] = None
+):
     """
     Display file preview based on file type
     
+    Runs as a fragment, so its widgets (e.g. the inline toggle) rerun
+    only the preview.
+    
     Args:
         submission_id: ID of the submission
         file_type: File extension (pdf, docx, pptx)
         height: Height of the preview component
+        file_url: Signed URL if already known (e.g. from api.get_signed_urls)
+        file_path: Storage path, used to cache the inline PDF fallback
     """
-    preview_url = api.get_file_url(submission_id)
+    preview_url = file_url or api.get_file_url(submission_id, file_path)
     
     if not preview_url:
         st.warning("File not available for preview")
         return
     
     if file_type == "pdf":
-        # PDF: Fetch and embed as base64 to avoid iframe blocking
-        try:
-            # Download PDF content
-            response = requests.get(preview_url, timeout=30)
-            if response.status_code == 200 and len(response.content) > 0:
-                # Encode PDF as base64
-                pdf_base64 = base64.b64encode(response.content).decode('utf-8')
-                
-                # Use PDF.js (Mozilla's PDF viewer) to render content directly via JavaScript
-                # This bypasses browser PDF plugin restrictions and iframe sandbox issues
-                pdf_viewer_html = f"""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <script src="https://cdnjs.cloudflare.com/ajax/libs/pdf.js/3.11.174/pdf.min.js"></script>
-                    <style>
-                        body {{ margin: 0; padding: 0; background-color: #525659; display: flex; flex-direction: column; align-items: center; }}
-                        #the-canvas {{ border: 1px solid black; direction: ltr; margin-bottom: 10px; }}
-                        #controls {{ position: sticky; top: 0; background: #333; color: white; padding: 8px; width: 100%; text-align: center; z-index: 100; }}
-                        button {{ cursor: pointer; padding: 5px 10px; background: #444; color: white; border: 1px solid #666; }}
-                        button:hover {{ background: #555; }}
-                    </style>
-                </head>
-                <body>
-                    <div id="controls">
-                        <button id="prev">Previous</button>
-                        <span>Page: <span id="page_num"></span> / <span id="page_count"></span></span>
-                        <button id="next">Next</button>
-                        <a href="{preview_url}" target="_blank" style="color: white; margin-left: 10px; text-decoration: none;">Download</a>
-                    </div>
-                    <canvas id="the-canvas"></canvas>
-                    <script>
-                        const url = 'data:application/pdf;base64,{pdf_base64}';
-                        var pdfjsLib = window['pdfjs-dist/build/pdf'];
-                        pdfjsLib.GlobalWorkerOptions.workerSrc = 'https://cdnjs.cloudflare.com/ajax/libs/pdf.js/3.11.174/pdf.worker.min.js';
-
-                        var pdfDoc = null,
-                            pageNum = 1,
-                            pageRendering = false,
-                            pageNumPending = null,
-                            scale = 1.0,
-                            canvas = document.getElementById('the-canvas'),
-                            ctx = canvas.getContext('2d');
-
-                        function renderPage(num) {{
-                            pageRendering = true;
-                            pdfDoc.getPage(num).then(function(page) {{
-                                var viewport = page.getViewport({{scale: scale}});
-                                // Calculate scale to fit width
-                                var desiredWidth = window.innerWidth - 40;
-                                var scaleRequired = desiredWidth / viewport.width;
-                                viewport = page.getViewport({{scale: scaleRequired}});
-                                
-                                canvas.height = viewport.height;
-                                canvas.width = viewport.width;
-
-                                var renderContext = {{
-                                    canvasContext: ctx,
-                                    viewport: viewport
-                                }};
-                                var renderTask = page.render(renderContext);
-
-                                renderTask.promise.then(function() {{
-                                    pageRendering = false;
-                                    if (pageNumPending !== null) {{
-                                        renderPage(pageNumPending);
-                                        pageNumPending = null;
-                                    }}
-                                }});
-                            }});
-
-                            document.getElementById('page_num').textContent = num;
-                        }}
-
-                        function queueRenderPage(num) {{
-                            if (pageRendering) {{
-                                pageNumPending = num;
-                            }} else {{
-                                renderPage(num);
-                            }}
-                        }}
-
-                        function onPrevPage() {{
-                            if (pageNum <= 1) {{
-                                return;
-                            }}
-                            pageNum--;
-                            queueRenderPage(pageNum);
-                        }}
-                        document.getElementById('prev').addEventListener('click', onPrevPage);
-
-                        function onNextPage() {{
-                            if (pageNum >= pdfDoc.numPages) {{
-                                return;
-                            }}
-                            pageNum++;
-                            queueRenderPage(pageNum);
-                        }}
-                        document.getElementById('next').addEventListener('click', onNextPage);
-
-                        pdfjsLib.getDocument(url).promise.then(function(pdfDoc_) {{
-                            pdfDoc = pdfDoc_;
-                            document.getElementById('page_count').textContent = pdfDoc.numPages;
-                            renderPage(pageNum);
-                        }});
-                    </script>
-                </body>
-                </html>
-                """
-                components.html(pdf_viewer_html, height=height, scrolling=True)
+        # PDF.js fetches the file from the signed URL itself, in ranges, so
+        # the PDF never passes through Streamlit or its websocket
+        source = {"url": preview_url, "rangeChunkSize": PDF_RANGE_CHUNK_SIZE, "disableAutoFetch": True}
+        
+        # Fallback for storage that blocks cross-origin reads: send the bytes inline
+        if st.toggle("Viewer not loading? Load inline", key=f"pdf_inline_{submission_id}"):
+            try:
+                pdf_bytes = _fetch_pdf_bytes(file_path or f"submission:{submission_id}", preview_url)
+            except requests.RequestException as e:
+                # Not cached, so turning the toggle off and on retries
+                st.warning(f"Could not load the PDF inline: {e}")
             else:
-                st.warning(f"Could not load PDF (Status: {response.status_code})")
-            
-            # Always show download link as fallback
-            st.markdown(f"[📥 Download PDF]({preview_url})")
-            
-        except Exception as e:
-            st.error(f"Preview error: {str(e)[:100]}")
-            st.markdown(f"[📥 Download PDF]({preview_url})")
+                if pdf_bytes is None:
+                    st.warning(f"PDF is too large to load inline (limit {PDF_INLINE_MAX_BYTES // (1024 * 1024)} MB)")
+                else:
+                    source = {"data": base64.b64encode(pdf_bytes).decode("ascii")}
+        
+        components.html(_pdf_viewer_html(source, preview_url), height=height, scrolling=True)
+        
+        # Always show download link as fallback
+        st.markdown(f"[📥 Download PDF]({preview_url})")
         
     elif file_type == "docx":
         # DOCX: Download link
@@ -158,6 +81,154 @@ def show_file_preview(submission_id: int, file_type: str, height: int = 600):
         st.markdown(f"[📥 Download File]({preview_url})")
 
 
+@st.cache_data(ttl=3600, max_entries=PDF_INLINE_CACHE_ENTRIES, show_spinner=False)
+def _fetch_pdf_bytes(cache_key: str, _url: str) -> Optional[bytes]:
+    """
+    Download a PDF for the inline fallback
+    
+    Keyed by storage path (signed URLs change). At most PDF_INLINE_CACHE_ENTRIES
+    files of up to PDF_INLINE_MAX_BYTES are kept, bounding the cache's memory.
+    
+    Returns:
+        bytes: PDF content, or None if it is over the size limit (stored
+        files never change, so that answer is cached)
+    
+    Raises:
+        requests.RequestException: If the download fails (not cached)
+    """
+    with requests.get(_url, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(64 * 1024):
+            size += len(chunk)
+            if size > PDF_INLINE_MAX_BYTES:
+                return None
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _pdf_viewer_html(source: dict, download_url: str) -> str:
+    """
+    PDF.js viewer page
+    
+    Args:
+        source: getDocument() parameters, {"url": ...} or {"data": base64}
+        download_url: Link shown in the toolbar
+    """
+    # Use PDF.js (Mozilla's PDF viewer) to render content directly via JavaScript
+    # This bypasses browser PDF plugin restrictions and iframe sandbox issues
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <script src="https://cdnjs.cloudflare.com/ajax/libs/pdf.js/3.11.174/pdf.min.js"></script>
+        <style>
+            body {{ margin: 0; padding: 0; background-color: #525659; display: flex; flex-direction: column; align-items: center; }}
+            #the-canvas {{ border: 1px solid black; direction: ltr; margin-bottom: 10px; }}
+            #controls {{ position: sticky; top: 0; background: #333; color: white; padding: 8px; width: 100%; text-align: center; z-index: 100; }}
+            #error {{ color: #ffb4b4; padding: 20px; font-family: sans-serif; display: none; }}
+            button {{ cursor: pointer; padding: 5px 10px; background: #444; color: white; border: 1px solid #666; }}
+            button:hover {{ background: #555; }}
+        </style>
+    </head>
+    <body>
+        <div id="controls">
+            <button id="prev">Previous</button>
+            <span>Page: <span id="page_num"></span> / <span id="page_count"></span></span>
+            <button id="next">Next</button>
+            <a href={json.dumps(download_url)} target="_blank" style="color: white; margin-left: 10px; text-decoration: none;">Download</a>
+        </div>
+        <div id="error"></div>
+        <canvas id="the-canvas"></canvas>
+        <script>
+            var source = {json.dumps(source)};
+            if (source.data) {{
+                source = {{data: atob(source.data)}};
+            }}
+            var pdfjsLib = window['pdfjs-dist/build/pdf'];
+            pdfjsLib.GlobalWorkerOptions.workerSrc = 'https://cdnjs.cloudflare.com/ajax/libs/pdf.js/3.11.174/pdf.worker.min.js';
+
+            var pdfDoc = null,
+                pageNum = 1,
+                pageRendering = false,
+                pageNumPending = null,
+                scale = 1.0,
+                canvas = document.getElementById('the-canvas'),
+                ctx = canvas.getContext('2d');
+
+            function renderPage(num) {{
+                pageRendering = true;
+                pdfDoc.getPage(num).then(function(page) {{
+                    var viewport = page.getViewport({{scale: scale}});
+                    // Calculate scale to fit width
+                    var desiredWidth = window.innerWidth - 40;
+                    var scaleRequired = desiredWidth / viewport.width;
+                    viewport = page.getViewport({{scale: scaleRequired}});
+                    
+                    canvas.height = viewport.height;
+                    canvas.width = viewport.width;
+
+                    var renderContext = {{
+                        canvasContext: ctx,
+                        viewport: viewport
+                    }};
+                    var renderTask = page.render(renderContext);
+
+                    renderTask.promise.then(function() {{
+                        pageRendering = false;
+                        if (pageNumPending !== null) {{
+                            renderPage(pageNumPending);
+                            pageNumPending = null;
+                        }}
+                    }});
+                }});
+
+                document.getElementById('page_num').textContent = num;
+            }}
+
+            function queueRenderPage(num) {{
+                if (pageRendering) {{
+                    pageNumPending = num;
+                }} else {{
+                    renderPage(num);
+                }}
+            }}
+
+            function onPrevPage() {{
+                if (pageNum <= 1) {{
+                    return;
+                }}
+                pageNum--;
+                queueRenderPage(pageNum);
+            }}
+            document.getElementById('prev').addEventListener('click', onPrevPage);
+
+            function onNextPage() {{
+                if (pageNum >= pdfDoc.numPages) {{
+                    return;
+                }}
+                pageNum++;
+                queueRenderPage(pageNum);
+            }}
+            document.getElementById('next').addEventListener('click', onNextPage);
+
+            // With a URL, PDF.js fetches only the byte ranges it needs per page
+            pdfjsLib.getDocument(source).promise.then(function(pdfDoc_) {{
+                pdfDoc = pdfDoc_;
+                document.getElementById('page_count').textContent = pdfDoc.numPages;
+                renderPage(pageNum);
+            }}).catch(function(err) {{
+                var error = document.getElementById('error');
+                error.textContent = 'Could not load PDF: ' + err.message;
+                error.style.display = 'block';
+            }});
+        </script>
+    </body>
+    </html>
+    """
+
+
 def show_file_info(submission_id: int):
     """Display file metadata"""
     file_info = api.get_file_info(submission_id)
@@ -5,16 +5,40 @@ import streamlit as st
 from utils.supabase_api import api
 
 
+# Quick feedback buttons: label -> feedback text
+QUICK_FEEDBACK = {
+    "👍 Excellent": "Excellent work! Keep it up.",
+    "👌 Good": "Good effort. Minor improvements needed.",
+    "📝 Needs Work": "Needs significant improvement. Please review the requirements.",
+}
+
+
+@st.fragment
 def show_grading_form(submission_id: int, max_marks: int = 100, current_marks: int = None, current_feedback: str = None):
     """
     Display grading form for a submission
     
+    Runs as a fragment: saving (or a quick feedback button) reruns only
+    this form, not the page around it.
+    
     Args:
         submission_id: ID of the submission to grade
         max_marks: Maximum marks for the assignment
         current_marks: Existing marks if already reviewed
         current_feedback: Existing feedback if already reviewed
     """
+    # A grade saved in this session is newer than the caller's copy of the row
+    saved = st.session_state.get(f"saved_grade_{submission_id}")
+    if saved:
+        current_marks, current_feedback = saved
+    
+    marks_key = f"marks_{submission_id}"
+    feedback_key = f"feedback_{submission_id}"
+    if marks_key not in st.session_state:
+        st.session_state[marks_key] = current_marks if current_marks is not None else 0
+    if feedback_key not in st.session_state:
+        st.session_state[feedback_key] = current_feedback or ""
+    
     is_update = current_marks is not None
     
     if is_update:
@@ -25,11 +49,11 @@ def show_grading_form(submission_id: int, max_marks: int = 100, current_marks: i
     
     with st.form(f"grading_form_{submission_id}"):
         # Marks input
-        marks = st.number_input(
+        st.number_input(
             "Marks",
             min_value=0,
             max_value=max_marks,
-            value=current_marks if current_marks is not None else 0,
+            key=marks_key,
             help=f"Enter marks out of {max_marks}"
         )
         
@@ -37,48 +61,64 @@ def show_grading_form(submission_id: int, max_marks: int = 100, current_marks: i
         # Use the number input above as the single source of truth
         
         # Feedback textarea
-        feedback = st.text_area(
+        st.text_area(
             "Feedback",
-            value=current_feedback or "",
+            key=feedback_key,
             placeholder="Enter feedback for the student...",
             height=150
         )
         
-        # Quick feedback buttons
+        # Quick feedback buttons fill in the textarea (callbacks run before the rerun)
         st.markdown("**Quick Feedback:**")
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            if st.form_submit_button("👍 Excellent", use_container_width=True):
-                feedback = "Excellent work! Keep it up."
-        
-        with col2:
-            if st.form_submit_button("👌 Good", use_container_width=True):
-                feedback = "Good effort. Minor improvements needed."
-        
-        with col3:
-            if st.form_submit_button("📝 Needs Work", use_container_width=True):
-                feedback = "Needs significant improvement. Please review the requirements."
+        for col, (label, text) in zip(st.columns(len(QUICK_FEEDBACK)), QUICK_FEEDBACK.items()):
+            with col:
+                st.form_submit_button(
+                    label,
+                    use_container_width=True,
+                    on_click=_set_feedback,
+                    args=(feedback_key, text)
+                )
         
         st.markdown("---")
         
-        # Submit button
+        # Submit button (saves in a callback, so this run already shows the new grade)
         button_text = "💾 Update Grade" if is_update else "💾 Save Grade"
-        submitted = st.form_submit_button(button_text, use_container_width=True, type="primary")
-        
-        if submitted:
-            # Validate marks
-            if marks < 0 or marks > max_marks:
-                st.error(f"Marks must be between 0 and {max_marks}")
-                return
+        st.form_submit_button(
+            button_text,
+            use_container_width=True,
+            type="primary",
+            on_click=_save_grade,
+            args=(submission_id, max_marks)
+        )
+    
+    error = st.session_state.pop(f"grade_error_{submission_id}", None)
+    if error:
+        st.error(error)
+    elif st.session_state.pop(f"grade_saved_{submission_id}", False):
+        st.toast("✅ Grade saved successfully!")
+
+
+def _set_feedback(feedback_key: str, text: str):
+    st.session_state[feedback_key] = text
 
-            result = api.create_review(submission_id, marks, feedback)
-            
-            if "error" in result:
-                st.error(result["error"])
-            else:
-                st.success("✅ Grade saved successfully!")
-                st.rerun()
+
+def _save_grade(submission_id: int, max_marks: int):
+    """Save the form's values as the submission's review"""
+    marks = st.session_state[f"marks_{submission_id}"]
+    feedback = st.session_state[f"feedback_{submission_id}"]
+    
+    # Validate marks
+    if marks < 0 or marks > max_marks:
+        st.session_state[f"grade_error_{submission_id}"] = f"Marks must be between 0 and {max_marks}"
+        return
+    
+    result = api.create_review(submission_id, marks, feedback)
+    
+    if "error" in result:
+        st.session_state[f"grade_error_{submission_id}"] = result["error"]
+    else:
+        st.session_state[f"saved_grade_{submission_id}"] = (marks, feedback)
+        st.session_state[f"grade_saved_{submission_id}"] = True
 
 
 def show_grade_badge(marks: int, max_marks: int):
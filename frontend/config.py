@@ -1,6 +1,7 @@
 """
 Frontend Configuration
 """
+import os
 import streamlit as st
 
 # Configuration is loaded from .streamlit/secrets.toml
@@ -8,3 +9,16 @@ import streamlit as st
 
 # App Settings
 APP_TITLE = "Assignment Platform"
+
+# Legacy FastAPI backend (only used by utils/api.py)
+API_URL = os.getenv("API_URL", "http://localhost:8000")
+
+# Legacy backend HTTP transport
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "20"))  # keep-alive connections kept open
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "3.05"))
+API_READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "30"))
+API_RETRIES = int(os.getenv("API_RETRIES", "3"))  # idempotent requests only
+API_RETRY_BACKOFF = float(os.getenv("API_RETRY_BACKOFF", "0.3"))  # seconds, doubled per attempt, plus jitter
+
+# Blob storage, shared with the backend (same variable as its BLOB_GC_LEASE_SECONDS setting)
+BLOB_GC_LEASE_SECONDS = int(os.getenv("BLOB_GC_LEASE_SECONDS", "60"))  # a collector's claim on a blob expires after this
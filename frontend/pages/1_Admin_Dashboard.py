@@ -2,6 +2,7 @@
 Admin Dashboard Page
 """
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 
@@ -9,6 +10,9 @@ from utils.supabase_api import api
 from utils.rbac import check_access
 from components.sidebar import render_sidebar
 
+# Submissions further than this from the due date are grouped at the chart edges
+TIMING_WINDOW_DAYS = 14
+
 
 if not check_access(["admin"]):
     st.stop()
@@ -23,8 +27,16 @@ st.markdown(f"Welcome, **{user.get('name')}**!")
 st.markdown("---")
 
 # Fetch data
-assignments = api.list_assignments()
-submissions = api.list_submissions()
+store = api.get_store()
+assignments = store.assignments
+df = store.submissions_frame()
+
+# Per-assignment aggregates in one pass
+per_assignment = df.groupby("assignment_id").agg(
+    submissions=("id", "size"),
+    reviewed=("reviewed", "sum"),
+    avg_marks=("marks", "mean")
+)
 
 # Stats
 col1, col2, col3, col4 = st.columns(4)
@@ -33,14 +45,13 @@ with col1:
     st.metric("📝 Assignments", len(assignments))
 
 with col2:
-    st.metric("📤 Submissions", len(submissions))
+    st.metric("📤 Submissions", len(df))
 
 with col3:
-    reviewed = [s for s in submissions if s.get("status") == "reviewed"]
-    st.metric("✅ Reviewed", len(reviewed))
+    st.metric("✅ Reviewed", int(df["reviewed"].sum()))
 
 with col4:
-    pending = [s for s in submissions if s.get("status") == "pending"]
+    pending = store.submissions_for(status="pending")
     st.metric("🔄 Pending Review", len(pending), delta=f"-{len(pending)}" if pending else None)
 
 st.markdown("---")
@@ -74,32 +85,110 @@ else:
             
             st.markdown("---")
 
+# Charts
+st.subheader("📊 Analytics")
+
+if df.empty:
+    st.info("Charts will appear once students start submitting.")
+else:
+    titles = {a.get('id'): a.get('title') for a in assignments}
+    grades_tab, timing_tab, backlog_tab = st.tabs(["🎯 Grade Distribution", "⏱️ Submission Timing", "📥 Review Backlog"])
+    
+    with grades_tab:
+        chart_assignment = st.selectbox(
+            "Assignment",
+            options=[None] + list(per_assignment.index),
+            format_func=lambda x: "All assignments" if x is None else titles.get(x, str(x)),
+            key="grades_chart_assignment"
+        )
+        scores = df.loc[df["reviewed"], ["assignment_id", "score_pct"]].dropna()
+        if chart_assignment is not None:
+            scores = scores[scores["assignment_id"] == chart_assignment]
+        
+        if scores.empty:
+            st.info("No graded submissions yet.")
+        else:
+            # Bin before plotting so the chart carries 10 bars, not one point per submission
+            bands = pd.cut(scores["score_pct"].clip(0, 100), bins=range(0, 101, 10), include_lowest=True)
+            distribution = bands.value_counts(sort=False).rename_axis("band").reset_index(name="count")
+            distribution["band"] = [f"{int(b.left)}-{int(b.right)}%" for b in distribution["band"]]
+            fig = px.bar(distribution, x="band", y="count", labels={"band": "Score", "count": "Submissions"})
+            st.plotly_chart(fig, use_container_width=True)
+            st.caption(f"Mean {scores['score_pct'].mean():.1f}% · median {scores['score_pct'].median():.1f}% of max marks")
+    
+    with timing_tab:
+        timed = df.dropna(subset=["submitted_at", "due_date"])
+        if timed.empty:
+            st.info("No submissions to assignments with a due date yet.")
+        else:
+            days = (timed["submitted_at"] - timed["due_date"]).dt.total_seconds() / 86400
+            days = np.ceil(days.clip(-TIMING_WINDOW_DAYS, TIMING_WINDOW_DAYS)).astype(int)
+            timing = days.value_counts().sort_index().rename_axis("days").reset_index(name="count")
+            timing["when"] = timing["days"].map(lambda d: "Late" if d > 0 else "On time")
+            fig = px.bar(
+                timing, x="days", y="count", color="when",
+                color_discrete_map={"On time": "#2ca02c", "Late": "#d62728"},
+                labels={"days": "Days relative to due date", "count": "Submissions", "when": ""}
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            late = int((days > 0).sum())
+            st.caption(
+                f"{late} of {len(days)} submissions late ({late / len(days) * 100:.0f}%). "
+                f"Bars at ±{TIMING_WINDOW_DAYS} include everything further out."
+            )
+    
+    with backlog_tab:
+        # Pending reviews at the end of each day: submissions so far minus reviews so far
+        submitted_daily = df["submitted_at"].dt.floor("D").value_counts()
+        reviewed_daily = df.loc[df["reviewed"], "reviewed_at"].dt.floor("D").value_counts()
+        backlog = pd.concat([submitted_daily.rename("submitted"), reviewed_daily.rename("reviewed")], axis=1, sort=True)
+        backlog = backlog.fillna(0).cumsum()
+        backlog["pending"] = backlog["submitted"] - backlog["reviewed"]
+        
+        if not backlog.empty:
+            fig = px.area(
+                backlog.reset_index(names="day"), x="day", y="pending",
+                labels={"day": "Date", "pending": "Pending reviews"}
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        
+        by_assignment = per_assignment.assign(pending=per_assignment["submissions"] - per_assignment["reviewed"])
+        by_assignment = by_assignment.reset_index()
+        by_assignment["assignment"] = by_assignment["assignment_id"].map(titles).fillna("Unknown")
+        fig = px.bar(
+            by_assignment, x="assignment", y=["reviewed", "pending"],
+            labels={"assignment": "Assignment", "value": "Submissions", "variable": ""}
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+st.markdown("---")
+
 # Assignment Overview
 st.subheader("📈 Assignment Statistics")
 
 if assignments:
+    stats = per_assignment.to_dict("index")
     for assign in assignments:
-        assign_id = assign.get('id')
-        assign_subs = [s for s in submissions if s.get('assignment_id') == assign_id]
-        reviewed_subs = [s for s in assign_subs if s.get('status') == 'reviewed']
+        assign_stats = stats.get(assign.get('id'), {"submissions": 0, "reviewed": 0, "avg_marks": float("nan")})
+        submission_count = int(assign_stats["submissions"])
+        reviewed_count = int(assign_stats["reviewed"])
         
         with st.expander(f"📝 {assign.get('title')}"):
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                st.metric("Submissions", len(assign_subs))
+                st.metric("Submissions", submission_count)
             with col2:
-                st.metric("Reviewed", len(reviewed_subs))
+                st.metric("Reviewed", reviewed_count)
             with col3:
-                if reviewed_subs:
-                    avg = sum(s.get('marks', 0) for s in reviewed_subs) / len(reviewed_subs)
-                    st.metric("Avg Score", f"{avg:.1f}")
+                if reviewed_count and pd.notna(assign_stats["avg_marks"]):
+                    st.metric("Avg Score", f"{assign_stats['avg_marks']:.1f}")
                 else:
                     st.metric("Avg Score", "N/A")
             
             # Progress bar
-            if assign_subs:
-                progress = len(reviewed_subs) / len(assign_subs)
+            if submission_count:
+                progress = reviewed_count / submission_count
                 st.progress(progress, text=f"Review Progress: {progress*100:.0f}%")
 else:
     st.info("No assignments created yet. Go to 'Manage Assignments' to create one.")
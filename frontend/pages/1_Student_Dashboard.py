@@ -26,8 +26,9 @@ st.markdown(f"Welcome back, **{user.get('name')}**!")
 st.markdown("---")
 
 # Fetch data
-assignments = api.list_assignments()
-submissions = api.list_submissions()
+store = api.get_store()
+assignments = store.assignments
+submissions = store.submissions
 
 # Stats
 col1, col2, col3, col4 = st.columns(4)
@@ -39,7 +40,7 @@ with col2:
     st.metric("📤 Submitted", len(submissions))
 
 with col3:
-    reviewed = [s for s in submissions if s.get("status") == "reviewed"]
+    reviewed = store.submissions_for(status="reviewed")
     st.metric("✅ Graded", len(reviewed))
 
 with col4:
@@ -87,8 +88,7 @@ else:
 # Pending Assignments
 st.subheader("⏳ Pending Assignments")
 
-submitted_ids = [s.get('assignment_id') for s in submissions]
-pending = [a for a in assignments if a.get('id') not in submitted_ids]
+pending = store.pending_assignments(user.get('id'))
 
 if not pending:
     st.success("🎉 You're all caught up! No pending assignments.")
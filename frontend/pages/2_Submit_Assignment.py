@@ -22,13 +22,9 @@ user = st.session_state.user
 
 st.title("📤 Submit Assignment")
 
-# Fetch assignments
-assignments = api.list_assignments()
-submissions = api.list_submissions()
-submitted_ids = [s.get('assignment_id') for s in submissions]
-
-# Filter out already submitted
-available = [a for a in assignments if a.get('id') not in submitted_ids]
+# Fetch assignments, leaving out those already submitted
+store = api.get_store()
+available = store.pending_assignments(user.get('id'))
 
 if not available:
     st.info("🎉 You've submitted all available assignments!")
@@ -42,11 +38,11 @@ st.subheader("Select Assignment")
 selected_id = st.selectbox(
     "Choose an assignment to submit",
     options=[a.get('id') for a in available],
-    format_func=lambda x: next((a.get('title') for a in available if a.get('id') == x), str(x))
+    format_func=lambda x: (store.assignment(x) or {}).get('title', str(x))
 )
 
 # Show assignment details
-selected = next((a for a in available if a.get('id') == selected_id), None)
+selected = store.assignment(selected_id)
 
 if selected:
     with st.expander("📋 Assignment Details", expanded=True):
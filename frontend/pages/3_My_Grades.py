@@ -25,7 +25,8 @@ user = st.session_state.user
 st.title("📈 My Grades")
 
 # Fetch submissions
-submissions = api.list_submissions()
+store = api.get_store()
+submissions = store.submissions
 
 if not submissions:
     st.info("You haven't submitted any assignments yet.")
@@ -34,49 +35,63 @@ if not submissions:
 st.markdown("---")
 
 # Summary stats
-reviewed = [s for s in submissions if s.get("status") == "reviewed"]
-pending = [s for s in submissions if s.get("status") == "pending"]
-
 col1, col2, col3 = st.columns(3)
 with col1:
     st.metric("📤 Total Submissions", len(submissions))
 with col2:
-    st.metric("✅ Graded", len(reviewed))
+    st.metric("✅ Graded", store.count(status="reviewed"))
 with col3:
-    st.metric("🔄 Pending", len(pending))
+    st.metric("🔄 Pending", store.count(status="pending"))
 
 st.markdown("---")
 
 # Detailed view
-st.subheader("📋 All Submissions")
-
-for sub in submissions:
-    with st.expander(f"📝 {sub.get('assignment_title', 'Unknown')} - {sub.get('status', 'pending').upper()}"):
-        col1, col2 = st.columns([2, 1])
+@st.fragment
+def show_submission_details(sub: dict):
+    """Grade, feedback and file of one submission (the preview button reruns only this)"""
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        st.markdown(f"**Submitted:** {sub.get('submitted_at', '')[:10]}")
+        st.markdown(f"**File Type:** {sub.get('file_type', 'N/A').upper()}")
         
-        with col1:
-            st.markdown(f"**Submitted:** {sub.get('submitted_at', '')[:10]}")
-            st.markdown(f"**File Type:** {sub.get('file_type', 'N/A').upper()}")
-            
-            if sub.get("status") == "reviewed":
-                st.markdown("---")
-                st.markdown("### Grade")
-                show_grade_badge(sub.get('marks'), 100)  # Assuming max 100
-                
-                if sub.get('feedback'):
-                    st.markdown("### Feedback")
-                    st.info(sub.get('feedback'))
-            else:
-                st.warning("⏳ This submission is pending review.")
-        
-        with col2:
-            st.markdown("### File Preview")
-            show_file_info(sub.get('id'))
+        if sub.get("status") == "reviewed":
+            st.markdown("---")
+            st.markdown("### Grade")
+            assignment = store.assignment(sub.get('assignment_id')) or {}
+            show_grade_badge(sub.get('marks'), assignment.get('max_marks') or 100)
             
-            if st.button("👁️ Preview File", key=f"preview_{sub.get('id')}"):
-                st.session_state[f"show_preview_{sub.get('id')}"] = True
+            if sub.get('feedback'):
+                st.markdown("### Feedback")
+                st.info(sub.get('feedback'))
+        else:
+            st.warning("⏳ This submission is pending review.")
+    
+    with col2:
+        st.markdown("### File Preview")
+        show_file_info(sub.get('id'))
         
-        # Show preview if requested
-        if st.session_state.get(f"show_preview_{sub.get('id')}"):
-            st.markdown("---")
-            show_file_preview(sub.get('id'), sub.get('file_type'))
+        if st.button("👁️ Preview File", key=f"preview_{sub.get('id')}"):
+            st.session_state[f"show_preview_{sub.get('id')}"] = True
+    
+    # Show preview if requested
+    if st.session_state.get(f"show_preview_{sub.get('id')}"):
+        st.markdown("---")
+        show_file_preview(sub.get('id'), sub.get('file_type'), file_path=sub.get('file_path'))
+
+
+st.subheader("📋 All Submissions")
+
+# Listed a page at a time, with grades and feedback
+feed = api.get_feed("grades")
+
+for sub in feed.rows:
+    with st.expander(f"📝 {sub.get('assignment_title', 'Unknown')} - {sub.get('status', 'pending').upper()}"):
+        show_submission_details(sub)
+
+if feed.has_more:
+    if st.button("⬇️ Load more"):
+        api.load_more(feed)
+        st.rerun()
+elif feed.full:
+    st.caption(f"Showing your newest {feed.max_rows} submissions.")
@@ -8,7 +8,7 @@ sys.path.append("..")
 from components.auth import require_auth, require_admin
 from components.file_preview import show_file_preview, show_file_info
 from components.grading import show_grading_form
-from utils.supabase_api import api
+from utils.supabase_api import api, SUBMISSIONS_PAGE_SIZE
 
 st.set_page_config(page_title="Review Submissions", page_icon="✅", layout="wide")
 
@@ -22,13 +22,6 @@ render_sidebar()
 
 st.title("✅ Review Submissions")
 
-# Fetch submissions
-submissions = api.list_submissions()
-
-if not submissions:
-    st.info("No submissions to review yet.")
-    st.stop()
-
 st.markdown("---")
 
 # Filter options
@@ -42,74 +35,104 @@ with col1:
     )
 
 with col2:
-    # Get unique assignments
-    assignments = list(set(s.get('assignment_title', 'Unknown') for s in submissions))
+    assignments = {a.get('id'): a for a in api.list_assignments()}
     assignment_filter = st.selectbox(
         "Filter by Assignment",
-        options=["All"] + assignments
+        options=[None] + list(assignments),
+        format_func=lambda x: "All" if x is None else assignments.get(x, {}).get('title', 'Unknown')
     )
 
-# Apply filters
-filtered = submissions
-if status_filter != "all":
-    filtered = [s for s in filtered if s.get('status') == status_filter]
-if assignment_filter != "All":
-    filtered = [s for s in filtered if s.get('assignment_title') == assignment_filter]
-
-st.markdown(f"**Showing {len(filtered)} submissions**")
-st.markdown("---")
+# Only the pages loaded so far are held; filters run in the database
+feed = api.get_feed(
+    "review",
+    status=None if status_filter == "all" else status_filter,
+    assignment_id=assignment_filter
+)
 
 # Check if coming from dashboard with specific submission
 if "review_submission_id" in st.session_state:
-    selected_id = st.session_state.review_submission_id
+    st.session_state.review_selected_id = st.session_state.review_submission_id
     del st.session_state.review_submission_id
-else:
-    selected_id = None
-
-# Submission list with review panel
-for sub in filtered:
-    sub_id = sub.get('id')
-    is_expanded = selected_id == sub_id
-    
-    status_icon = "✅" if sub.get('status') == 'reviewed' else "🔄"
-    header = f"{status_icon} {sub.get('student_name', 'Unknown')} - {sub.get('assignment_title', 'Unknown')}"
-    
-    with st.expander(header, expanded=is_expanded):
-        # Two-column layout: Preview on left, grading on right
-        col1, col2 = st.columns([3, 2])
-        
-        with col1:
-            st.subheader("📄 File Preview")
-            
-            # File info
-            show_file_info(sub_id)
-            
-            # Preview
-            file_type = sub.get('file_type', 'pdf')
-            
-            # Initialize slide state for PPT
-            if f"current_slide_{sub_id}" not in st.session_state:
-                st.session_state[f"current_slide_{sub_id}"] = 1
-            
-            show_file_preview(sub_id, file_type, height=500)
-            
-            # Download option
-            download_url = api.get_file_url(sub_id)
-            if download_url:
-                st.markdown(f"[📥 Download Original File]({download_url})")
-        
-        with col2:
-            st.markdown(f"**Student:** {sub.get('student_name', 'Unknown')}")
-            st.markdown(f"**Submitted:** {sub.get('submitted_at', '')[:10]}")
-            
-            st.markdown("---")
-            
-            # Get max marks from assignment (default 100)
-            max_marks = 100  # Could fetch from assignment
-            
-            show_grading_form(
-                submission_id=sub_id,
-                max_marks=max_marks,
-                current_marks=sub.get('marks'),
-                current_feedback=sub.get('feedback')
-            )
+
+if not feed.rows and "review_selected_id" not in st.session_state:
+    if status_filter == "all" and assignment_filter is None:
+        st.info("No submissions to review yet.")
+    else:
+        st.info("No submissions match these filters.")
+    st.stop()
+
+st.markdown(f"**Showing {len(feed.rows)} submissions**")
+st.markdown("---")
+
+list_col, detail_col = st.columns([2, 3])
+
+# ============ Submission list (loaded pages only) ============
+with list_col:
+    for sub in feed.rows:
+        sub_id = sub.get('id')
+        status_icon = "✅" if sub.get('status') == 'reviewed' else "🔄"
+        label = f"{status_icon} {sub.get('student_name', 'Unknown')} - {sub.get('assignment_title', 'Unknown')}"
+        is_selected = st.session_state.get("review_selected_id") == sub_id
+
+        if st.button(label, key=f"select_{sub_id}", use_container_width=True, type="primary" if is_selected else "secondary"):
+            st.session_state.review_selected_id = sub_id
+            st.rerun()
+
+    if feed.has_more:
+        if st.button("⬇️ Load more", use_container_width=True):
+            api.load_more(feed)
+            st.rerun()
+    elif feed.full:
+        st.caption(f"Showing the newest {feed.max_rows} submissions. Narrow the filters to find older ones.")
+
+# ============ Detail pane (selected submission only) ============
+with detail_col:
+    selected_id = st.session_state.get("review_selected_id")
+    # A submission opened from the dashboard may not be loaded here yet
+    sub = feed.submission(selected_id) if selected_id is not None else None
+    if sub is None and selected_id is not None:
+        sub = api.get_submission(selected_id)
+
+    if sub is None:
+        st.info("👈 Select a submission to review it.")
+        st.stop()
+
+    # Sign the last loaded page in one storage call; the URLs stay cached
+    # while the reviewer moves between the listed submissions
+    page_rows = feed.rows[-SUBMISSIONS_PAGE_SIZE:]
+    file_urls = api.get_signed_urls([s.get('file_path') for s in page_rows] + [sub.get('file_path')])
+    download_url = file_urls.get(sub.get('file_path'))
+
+    st.subheader(f"{sub.get('student_name', 'Unknown')} - {sub.get('assignment_title', 'Unknown')}")
+    st.markdown(f"**Submitted:** {sub.get('submitted_at', '')[:10]}")
+
+    preview_tab, grade_tab = st.tabs(["📄 File Preview", "📝 Grade"])
+
+    with preview_tab:
+        # File info
+        show_file_info(sub['id'])
+
+        # Preview
+        file_type = sub.get('file_type', 'pdf')
+
+        # Initialize slide state for PPT
+        if f"current_slide_{sub['id']}" not in st.session_state:
+            st.session_state[f"current_slide_{sub['id']}"] = 1
+
+        show_file_preview(sub['id'], file_type, height=600, file_url=download_url, file_path=sub.get('file_path'))
+
+        # Download option (saved under the uploaded filename)
+        original_url = api.get_download_url(sub)
+        if original_url:
+            st.markdown(f"[📥 Download Original File]({original_url})")
+
+    with grade_tab:
+        # Max marks from the assignment (default 100, as the backend validates)
+        max_marks = assignments.get(sub.get('assignment_id'), {}).get('max_marks') or 100
+
+        show_grading_form(
+            submission_id=sub['id'],
+            max_marks=max_marks,
+            current_marks=sub.get('marks'),
+            current_feedback=sub.get('feedback')
+        )
@@ -1,15 +1,65 @@
 """
 API Client - Communicate with FastAPI backend
 """
+import json
+import logging
 import requests
+import threading
+import time
+from collections import OrderedDict
+from http.cookiejar import DefaultCookiePolicy
 from typing import Optional, Dict, Any, List
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util import Retry
 import streamlit as st
-from config import API_URL
+from config import (
+    API_URL, API_POOL_SIZE, API_CONNECT_TIMEOUT, API_READ_TIMEOUT, API_RETRIES, API_RETRY_BACKOFF
+)
+
+logger = logging.getLogger(__name__)
+
+# Max GET responses kept for conditional revalidation
+VALIDATOR_CACHE_SIZE = 256
+
+# Methods safe to resend after a failure or a 502/503/504 (POST is never retried)
+RETRY_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+def create_session() -> requests.Session:
+    """
+    HTTP session with a keep-alive connection pool and retries
+    
+    Idempotent requests are retried on connection errors, read errors and
+    502/503/504 with exponential, jittered backoff. Connection failures are
+    retried for any method, as nothing reached the server.
+    """
+    retry = Retry(
+        total=API_RETRIES,
+        allowed_methods=RETRY_METHODS,
+        status_forcelist=(502, 503, 504),
+        backoff_factor=API_RETRY_BACKOFF,
+        backoff_jitter=API_RETRY_BACKOFF,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=API_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # The session is shared by every user; never replay one user's cookies for another
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
 
 
 class APIClient:
     def __init__(self):
         self.base_url = API_URL
+        # Shared by all sessions; requests.Session pools connections per host
+        self.http = create_session()
+        # (auth header, url, params) -> (etag, body bytes); parsed per call, so
+        # callers get their own objects and may modify them
+        self._validators: OrderedDict = OrderedDict()
+        self._validators_lock = threading.Lock()
     
     def _get_headers(self) -> Dict[str, str]:
         """Get headers with auth token if available"""
@@ -18,8 +68,8 @@ class APIClient:
             headers["Authorization"] = f"Bearer {st.session_state.token}"
         return headers
     
-    def _request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
-        """Make API request"""
+    def _request(self, method: str, endpoint: str, revalidate: bool = True, **kwargs) -> Dict[str, Any]:
+        """Make API request (revalidate=False skips the cached ETag for a GET)"""
         url = f"{self.base_url}{endpoint}"
         headers = self._get_headers()
         
@@ -27,8 +77,37 @@ class APIClient:
         if "files" in kwargs:
             headers.pop("Content-Type", None)
         
+        # Revalidate cached GET responses instead of refetching them
+        cache_key = None
+        cached = None
+        if method == "GET":
+            cache_key = (headers.get("Authorization"), url, repr(sorted((kwargs.get("params") or {}).items())))
+            if revalidate:
+                with self._validators_lock:
+                    cached = self._validators.get(cache_key)
+            if cached:
+                headers["If-None-Match"] = cached[0]
+        
+        start = time.perf_counter()
         try:
-            response = requests.request(method, url, headers=headers, timeout=30, **kwargs)
+            response = self.http.request(
+                method, url, headers=headers, timeout=(API_CONNECT_TIMEOUT, API_READ_TIMEOUT), **kwargs
+            )
+            logger.info(
+                "%s %s -> %s in %.0f ms",
+                method, endpoint, response.status_code, (time.perf_counter() - start) * 1000
+            )
+            
+            if response.status_code == 304 and cached:
+                with self._validators_lock:
+                    current = self._validators.get(cache_key)
+                    hit = current is not None and current[0] == cached[0]
+                    if hit:
+                        self._validators.move_to_end(cache_key)
+                if not hit:
+                    # Evicted or replaced while the request was in flight: fetch it in full
+                    return self._request(method, endpoint, revalidate=False, **kwargs)
+                return json.loads(cached[1])
             
             if response.status_code == 401:
                 st.session_state.token = None
@@ -50,8 +129,22 @@ class APIClient:
             if not response.text:
                 return {"error": "Server returned empty response"}
             
-            return response.json()
-        except requests.exceptions.ConnectionError:
+            data = response.json()
+            etag = response.headers.get("ETag")
+            if cache_key and etag:
+                with self._validators_lock:
+                    self._validators[cache_key] = (etag, response.content)
+                    self._validators.move_to_end(cache_key)
+                    while len(self._validators) > VALIDATOR_CACHE_SIZE:
+                        self._validators.popitem(last=False)
+            return data
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            # Read timeouts that used up their retries surface as ConnectionError
+            reason = getattr(e.args[0], "reason", None) if e.args else None
+            if isinstance(e, requests.exceptions.ReadTimeout) or isinstance(reason, ReadTimeoutError):
+                logger.warning("%s %s timed out after %.0f ms", method, endpoint, (time.perf_counter() - start) * 1000)
+                return {"error": "The server took too long to respond. Please try again."}
+            logger.warning("%s %s failed to connect after %.0f ms", method, endpoint, (time.perf_counter() - start) * 1000)
             return {"error": "Cannot connect to server. Is the backend running at http://localhost:8000?"}
         except requests.exceptions.JSONDecodeError as e:
             return {"error": f"Invalid response from server: {str(e)}"}
@@ -0,0 +1,217 @@
+"""
+Data Store - Indexed view of assignments and submissions for the pages
+
+Pages used to rebuild the same derived lists on every rerun with linear
+scans. A DataStore is built once per data version (see
+SupabaseAPI.get_store) and answers lookups from dict and set indexes.
+It is shared between reruns and sessions, so pages treat it as read-only;
+only SupabaseAPI applies its own writes to it, through the methods under
+"Local changes".
+"""
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+# Columns of DataStore.submissions_frame()
+FRAME_COLUMNS = ["id", "assignment_id", "student_id", "status", "marks", "submitted_at", "reviewed_at"]
+
+
+class DataStore:
+    """Assignments and submissions visible to one role/student, indexed by ID, assignment, student and status"""
+    
+    def __init__(self, assignments: List[Dict], submissions: List[Dict]):
+        self._lock = threading.Lock()
+        self._publish(assignments, submissions)
+    
+    def _publish(self, assignments: List[Dict], submissions: List[Dict]):
+        """Index new lists and swap them in (readers keep whatever lists they already hold)"""
+        by_assignment: Dict[int, List[Dict]] = defaultdict(list)
+        by_student: Dict[int, List[Dict]] = defaultdict(list)
+        by_status: Dict[str, List[Dict]] = defaultdict(list)
+        by_assignment_status: Dict[tuple, List[Dict]] = defaultdict(list)
+        submitted: Dict[int, Set[int]] = defaultdict(set)  # student -> assignment IDs
+        
+        for sub in submissions:
+            assignment_id = sub.get("assignment_id")
+            status = sub.get("status", "pending")
+            by_assignment[assignment_id].append(sub)
+            by_student[sub.get("student_id")].append(sub)
+            by_status[status].append(sub)
+            by_assignment_status[(assignment_id, status)].append(sub)
+            submitted[sub.get("student_id")].add(assignment_id)
+        
+        # Lists keep the order they were loaded in (newest first)
+        self.assignments = assignments
+        self.submissions = submissions
+        self._assignments_by_id: Dict[int, Dict] = {a.get("id"): a for a in assignments}
+        self._submissions_by_id: Dict[int, Dict] = {s.get("id"): s for s in submissions}
+        self._by_assignment = by_assignment
+        self._by_student = by_student
+        self._by_status = by_status
+        self._by_assignment_status = by_assignment_status
+        self._submitted = submitted
+        self._frame: Optional[pd.DataFrame] = None
+    
+    # ============ Lookups ============
+    def assignment(self, assignment_id: int) -> Optional[Dict]:
+        return self._assignments_by_id.get(assignment_id)
+    
+    def submission(self, submission_id: int) -> Optional[Dict]:
+        return self._submissions_by_id.get(submission_id)
+    
+    def submissions_for(
+        self,
+        assignment_id: Optional[int] = None,
+        status: Optional[str] = None,
+        student_id: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Submissions matching all given filters, newest first
+        
+        Args:
+            assignment_id: Only submissions to this assignment
+            status: Only submissions with this status ("pending" / "reviewed")
+            student_id: Only this student's submissions
+        """
+        if assignment_id is not None and status is not None:
+            rows = self._by_assignment_status.get((assignment_id, status), [])
+        elif assignment_id is not None:
+            rows = self._by_assignment.get(assignment_id, [])
+        elif status is not None:
+            rows = self._by_status.get(status, [])
+        elif student_id is not None:
+            return self._by_student.get(student_id, [])
+        else:
+            return self.submissions
+        
+        if student_id is not None:
+            rows = [s for s in rows if s.get("student_id") == student_id]
+        return rows
+    
+    def count(self, assignment_id: Optional[int] = None, status: Optional[str] = None) -> int:
+        return len(self.submissions_for(assignment_id=assignment_id, status=status))
+    
+    # ============ Derived views ============
+    def submitted_assignment_ids(self, student_id: int) -> Set[int]:
+        """IDs of the assignments a student has submitted"""
+        return self._submitted.get(student_id, set())
+    
+    def pending_assignments(self, student_id: int) -> List[Dict]:
+        """Assignments a student has not submitted yet"""
+        submitted = self.submitted_assignment_ids(student_id)
+        return [a for a in self.assignments if a.get("id") not in submitted]
+    
+    def assignment_ids_with_submissions(self) -> List[int]:
+        """IDs of assignments that have at least one submission, in assignment order"""
+        return [a.get("id") for a in self.assignments if a.get("id") in self._by_assignment]
+    
+    # ============ Local changes ============
+    # Copy-on-write: rows and lists are replaced, never modified. A store is
+    # shared by every session with the same scope, so a failed write is
+    # undone row by row (revert_submission / restore_assignment), leaving
+    # other sessions' changes made meanwhile in place.
+    
+    def update_submission(self, submission_id: int, **changes) -> Optional[Tuple[Dict, Dict]]:
+        """
+        Change fields of one submission row
+        
+        Returns:
+            tuple: (previous row, new row) for revert_submission, or None if the row is not here
+        """
+        with self._lock:
+            previous = self._submissions_by_id.get(submission_id)
+            if previous is None:
+                return None
+            updated = {**previous, **changes}
+            submissions = [updated if s is previous else s for s in self.submissions]
+            self._publish(self.assignments, submissions)
+        return previous, updated
+    
+    def revert_submission(self, previous: Dict, applied: Dict) -> bool:
+        """Put `previous` back if the row is still `applied` (a later change to it is kept)"""
+        with self._lock:
+            if self._submissions_by_id.get(applied.get("id")) is not applied:
+                return False
+            submissions = [previous if s is applied else s for s in self.submissions]
+            self._publish(self.assignments, submissions)
+        return True
+    
+    def put_submission(self, row: Dict):
+        """Insert a submission row (as the newest) or replace the row with its ID"""
+        with self._lock:
+            if row.get("id") in self._submissions_by_id:
+                submissions = [row if s.get("id") == row.get("id") else s for s in self.submissions]
+            else:
+                submissions = [row] + self.submissions
+            self._publish(self.assignments, submissions)
+    
+    def put_assignment(self, row: Dict):
+        """Insert an assignment row (as the newest) or replace the row with its ID"""
+        with self._lock:
+            if row.get("id") in self._assignments_by_id:
+                assignments = [row if a.get("id") == row.get("id") else a for a in self.assignments]
+            else:
+                assignments = [row] + self.assignments
+            self._publish(assignments, self.submissions)
+    
+    def remove_assignment(self, assignment_id: int) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Drop an assignment and its submissions (the database cascades the same way)
+        
+        Returns:
+            tuple: (removed assignments, removed submissions) for restore_assignment
+        """
+        with self._lock:
+            removed_assignments = [a for a in self.assignments if a.get("id") == assignment_id]
+            removed_submissions = [s for s in self.submissions if s.get("assignment_id") == assignment_id]
+            self._publish(
+                [a for a in self.assignments if a.get("id") != assignment_id],
+                [s for s in self.submissions if s.get("assignment_id") != assignment_id]
+            )
+        return removed_assignments, removed_submissions
+    
+    def restore_assignment(self, assignments: List[Dict], submissions: List[Dict]):
+        """Put back rows removed by remove_assignment that have not been added again since"""
+        with self._lock:
+            assignments = [a for a in assignments if a.get("id") not in self._assignments_by_id]
+            submissions = [s for s in submissions if s.get("id") not in self._submissions_by_id]
+            if not assignments and not submissions:
+                return
+            # Back into their place in the newest-first order
+            self._publish(
+                sorted(self.assignments + assignments, key=lambda a: a.get("created_at") or "", reverse=True),
+                sorted(self.submissions + submissions, key=lambda s: s.get("submitted_at") or "", reverse=True)
+            )
+    
+    # ============ Analytics ============
+    def submissions_frame(self) -> pd.DataFrame:
+        """
+        Submissions as a DataFrame for vectorized aggregation (built on first use)
+        
+        Has FRAME_COLUMNS plus the assignment's due_date and max_marks,
+        `reviewed` (bool) and `score_pct` (marks as a percentage of max_marks).
+        Timestamps are timezone-aware UTC; missing values are NaN/NaT.
+        """
+        frame = self._frame
+        if frame is None:
+            submissions = self.submissions
+            frame = pd.DataFrame(submissions, columns=FRAME_COLUMNS)
+            assignments = pd.DataFrame(self.assignments, columns=["id", "due_date", "max_marks"])
+            frame = frame.merge(
+                assignments.rename(columns={"id": "assignment_id"}),
+                on="assignment_id",
+                how="left"
+            )
+            
+            for column in ("submitted_at", "reviewed_at", "due_date"):
+                frame[column] = pd.to_datetime(frame[column], utc=True, errors="coerce", format="ISO8601")
+            frame["marks"] = pd.to_numeric(frame["marks"], errors="coerce")
+            frame["max_marks"] = pd.to_numeric(frame["max_marks"], errors="coerce").fillna(100)
+            frame["reviewed"] = frame["status"] == "reviewed"
+            frame["score_pct"] = frame["marks"] / frame["max_marks"] * 100
+            # Keep it only if no local change was published meanwhile
+            if self.submissions is submissions:
+                self._frame = frame
+        return frame
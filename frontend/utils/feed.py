@@ -0,0 +1,61 @@
+"""
+Submission Feed - Submissions a page loads a page at a time ("Load more")
+
+Unlike a DataStore, which holds everything one role/student sees and is
+shared by all sessions, a feed belongs to one session and holds only the
+rows its page has asked for so far, up to a fixed cap. SupabaseAPI.get_feed
+creates and fills it; pages only read it.
+"""
+from typing import Dict, List, Optional, Tuple
+
+# Keyset cursor: (submitted_at, id) of the last row loaded
+Cursor = Tuple[str, int]
+
+
+class SubmissionFeed:
+    """Submissions loaded so far for one page and set of filters, newest first"""
+    
+    def __init__(self, key: tuple, filters: Dict, max_rows: int):
+        self.key = key
+        self.filters = filters
+        self.max_rows = max_rows
+        self.rows: List[Dict] = []
+        self.cursor: Optional[Cursor] = None
+        self.exhausted = False
+    
+    @property
+    def full(self) -> bool:
+        """The feed holds max_rows rows and loads no more"""
+        return len(self.rows) >= self.max_rows
+    
+    @property
+    def has_more(self) -> bool:
+        return not self.exhausted and not self.full
+    
+    def extend(self, rows: List[Dict], cursor: Optional[Cursor]):
+        """Append the next page; a None cursor means there is nothing after it"""
+        self.rows = self.rows + rows[:self.max_rows - len(self.rows)]
+        self.cursor = cursor
+        self.exhausted = cursor is None
+    
+    def submission(self, submission_id: int) -> Optional[Dict]:
+        return next((s for s in self.rows if s.get("id") == submission_id), None)
+    
+    # ============ Local changes ============
+    # Same interface as DataStore, so SupabaseAPI applies writes to both alike
+    
+    def update_submission(self, submission_id: int, **changes) -> Optional[Tuple[Dict, Dict]]:
+        """Change fields of one loaded row; returns (previous row, new row), or None if not loaded"""
+        previous = self.submission(submission_id)
+        if previous is None:
+            return None
+        updated = {**previous, **changes}
+        self.rows = [updated if s is previous else s for s in self.rows]
+        return previous, updated
+    
+    def revert_submission(self, previous: Dict, applied: Dict) -> bool:
+        """Put `previous` back if the row is still `applied`"""
+        if not any(s is applied for s in self.rows):
+            return False
+        self.rows = [previous if s is applied else s for s in self.rows]
+        return True
@@ -0,0 +1,78 @@
+"""
+Page Data Loader - Run independent Supabase reads concurrently
+
+A cold page load used to pay for each read in turn. load_parallel submits
+them to one thread pool shared by all sessions and waits for all of them,
+so the load costs about as much as the slowest read. run_in_background
+uses the same pool for work nobody waits for.
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on reads in flight across all sessions of this server
+LOADER_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=LOADER_WORKERS, thread_name_prefix="page-loader")
+
+
+def load_parallel(**loaders: Callable[[], Any]) -> Dict[str, Any]:
+    """
+    Call each loader on the shared pool and return their results by name
+    
+    Loaders run with the calling script's context, so st.cache_data and
+    st.error behave as they would on the script thread. If a loader raises,
+    the first exception is re-raised after all loaders have finished.
+    
+    Example:
+        data = load_parallel(assignments=api.list_assignments, users=load_users)
+    """
+    if len(loaders) <= 1:
+        return {name: loader() for name, loader in loaders.items()}
+    
+    ctx = get_script_run_ctx(suppress_warning=True)
+    
+    def run(loader: Callable[[], Any]) -> Any:
+        # Pool threads serve every session, so the caller's context is
+        # attached for this task only; later tasks must not see it
+        thread = threading.current_thread()
+        previous = get_script_run_ctx(suppress_warning=True)
+        if ctx is not None:
+            add_script_run_ctx(thread, ctx)
+        try:
+            return loader()
+        finally:
+            _set_script_run_ctx(thread, previous)
+    
+    futures = {name: _executor.submit(run, loader) for name, loader in loaders.items()}
+    errors = [f.exception() for f in futures.values() if f.exception() is not None]
+    if errors:
+        raise errors[0]
+    return {name: future.result() for name, future in futures.items()}
+
+
+def run_in_background(task: Callable[..., Any], *args) -> Future:
+    """Run a task on the shared pool without waiting for it; failures are logged"""
+    future = _executor.submit(task, *args)
+    future.add_done_callback(_log_failure)
+    return future
+
+
+def _set_script_run_ctx(thread: threading.Thread, ctx):
+    """Attach ctx to a thread, or detach its context if ctx is None"""
+    if ctx is None:
+        if hasattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME):
+            delattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME)
+    else:
+        add_script_run_ctx(thread, ctx)
+
+
+def _log_failure(future: Future):
+    if future.exception() is not None:
+        logger.error("Background task failed", exc_info=future.exception())
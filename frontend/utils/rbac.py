@@ -1,13 +1,15 @@
 
 import streamlit as st
 import time
+from utils.session import restore_session
 
 def check_access(allowed_roles):
     """
     Check if current user has access to this page.
     If not, show error and redirect to main app.
     """
-    if "user" not in st.session_state or not st.session_state.user:
+    # Pages opened directly (bookmark, browser refresh) start without a session
+    if not restore_session():
         st.error("Please login to access this page")
         time.sleep(1)
         st.switch_page("app.py")
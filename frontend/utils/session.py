@@ -4,6 +4,9 @@ Session Management Utility
 import streamlit as st
 import extra_streamlit_components as stx
 import datetime
+from typing import Optional, Dict
+
+from utils.supabase_api import api, decode_token
 
 def get_manager():
     """Get cookie manager instance - uses session state to ensure single instance"""
@@ -12,6 +15,11 @@ def get_manager():
     return st.session_state._cookie_manager
 
 def get_cookie(name):
+    # Cookies sent with the page request are available on the first run; the
+    # cookie manager component only reports them after a browser round trip
+    value = st.context.cookies.get(name)
+    if value:
+        return value
     cookie_manager = get_manager()
     cookies = cookie_manager.get_all()
     return cookies.get(name)
@@ -24,3 +32,38 @@ def set_cookie(name, value, days=7):
 def delete_cookie(name):
     cookie_manager = get_manager()
     cookie_manager.delete(name)
+
+def restore_session() -> Optional[Dict]:
+    """
+    Restore the logged-in user from the token cookie, in the current run
+    
+    The token is validated locally. Profile fields come from its claims;
+    tokens issued before those claims existed fall back to the cached
+    profile lookup. Returns the user, or None if there is no valid session.
+    """
+    if st.session_state.get("user") and st.session_state.get("token"):
+        return st.session_state.user
+    # The request's cookies do not change after logout, so do not log back in from them
+    if st.session_state.get("logged_out"):
+        return None
+    
+    token = get_cookie("token")
+    token_data = decode_token(token) if token else None
+    if not token_data:
+        return None
+    
+    if token_data.get("name"):
+        user = {
+            "id": token_data["user_id"],
+            "role": token_data["role"],
+            "name": token_data["name"],
+            "email": token_data.get("email")
+        }
+    else:
+        user = api.get_profile(token_data["user_id"])
+        if not user:
+            return None
+    
+    st.session_state.token = token
+    st.session_state.user = user
+    return user
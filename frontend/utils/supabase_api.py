@@ -3,19 +3,60 @@ Supabase API Client - Direct database operations
 Replaces the HTTP-based API client
 """
 import streamlit as st
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timedelta
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
 from jose import jwt
-import uuid
+import hashlib
+import re
+import threading
+import time
+import weakref
 
+from config import BLOB_GC_LEASE_SECONDS
 from utils.database import get_db
+from utils.datastore import DataStore
+from utils.feed import Cursor, SubmissionFeed
+from utils.loader import load_parallel, run_in_background
 
 
 # Password hasher
 ph = PasswordHasher()
 
+# Profiles looked up for tokens without profile claims are cached this long
+PROFILE_CACHE_TTL = 5 * 60
+
+# Signed storage URLs are valid for this long and re-signed this long before they expire
+SIGNED_URL_TTL = 60 * 60
+SIGNED_URL_REFRESH_MARGIN = 5 * 60
+
+# How often an upload checks whether garbage collection has let go of a blob
+GC_WAIT_INTERVAL = 0.2
+
+# Object names of uploads stored before content hashing, which embed the
+# uploaded filename: {user_id}_{assignment_id}_{uuid8}_{name} from this app,
+# {uuid4}_{name} from the legacy backend
+LEGACY_UPLOAD_NAME = re.compile(r"^(?:\d+_\d+_[0-9a-f]{8}|[0-9a-f]{8}-[0-9a-f-]{27})_(.+)$")
+
+# Submissions fetched per "Load more", and the most one session's list may hold
+SUBMISSIONS_PAGE_SIZE = 20
+MAX_SESSION_ROWS = 500
+
+# Assignment lists hold at most this many (newest first)
+MAX_ASSIGNMENTS = 1000
+
+# Submission rows for the pages, with the joins _submission_row flattens
+SUBMISSION_COLUMNS = "*, users!student_id(name), assignments!assignment_id(title), reviews(*)"
+# Cached stores only need what the dashboards and file lookups use (no feedback text)
+STORE_SUBMISSION_COLUMNS = (
+    "id, assignment_id, student_id, file_path, file_type, status, submitted_at, "
+    "users!student_id(name), assignments!assignment_id(title), reviews(marks, reviewed_at)"
+)
+
+# Session state key of the current page's SubmissionFeed (one per session)
+FEED_KEY = "submission_feed"
+
 
 def hash_password(password: str) -> str:
     """Hash a password using argon2"""
@@ -31,14 +72,18 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
-def create_access_token(user_id: int, role: str) -> str:
-    """Create JWT access token"""
+def create_access_token(user_id: int, role: str, name: Optional[str] = None, email: Optional[str] = None) -> str:
+    """Create JWT access token (name and email let a session be restored without a user lookup)"""
     expire = datetime.utcnow() + timedelta(minutes=60 * 24 * 7)  # 7 days
     to_encode = {
         "sub": str(user_id),
         "role": role,
         "exp": expire
     }
+    if name is not None:
+        to_encode["name"] = name
+    if email is not None:
+        to_encode["email"] = email
     return jwt.encode(to_encode, st.secrets["JWT_SECRET"], algorithm="HS256")
 
 
@@ -48,7 +93,9 @@ def decode_token(token: str) -> Optional[Dict]:
         payload = jwt.decode(token, st.secrets["JWT_SECRET"], algorithms=["HS256"])
         return {
             "user_id": int(payload.get("sub")),
-            "role": payload.get("role")
+            "role": payload.get("role"),
+            "name": payload.get("name"),
+            "email": payload.get("email")
         }
     except:
         return None
@@ -59,6 +106,12 @@ class SupabaseAPI:
     
     def __init__(self):
         self.db = get_db()
+        # (storage path, download filename) -> (signed URL, expiry timestamp), shared by all sessions
+        self._signed_urls: Dict[Tuple[str, Optional[str]], Tuple[str, float]] = {}
+        self._signed_urls_lock = threading.Lock()
+        # (role, student_id) -> the cached store for it, so writes can be applied
+        # to the cached data; entries vanish when the cache drops the store
+        self._live_stores: "weakref.WeakValueDictionary[tuple, DataStore]" = weakref.WeakValueDictionary()
     
     def _get_current_user(self) -> Optional[Dict]:
         """Get current authenticated user from session"""
@@ -117,7 +170,7 @@ class SupabaseAPI:
                 return {"error": "Invalid email or password"}
             
             # Create token
-            token = create_access_token(user["id"], user["role"])
+            token = create_access_token(user["id"], user["role"], user.get("name"), user.get("email"))
             return {"access_token": token, "user": user}
         except Exception as e:
             return {"error": f"Login failed: {str(e)}"}
@@ -132,12 +185,18 @@ class SupabaseAPI:
         except Exception as e:
             return {"error": str(e)}
     
+    @st.cache_data(ttl=PROFILE_CACHE_TTL)
+    def get_profile(_self, user_id: int) -> Optional[Dict]:
+        """Public profile fields of a user (cached per user), or None if not found"""
+        result = _self.db.table("users").select("id, email, name, role, created_at").eq("id", user_id).execute()
+        return result.data[0] if result.data else None
+    
     # ============ Assignments ============
     @st.cache_data(ttl=60)
     def list_assignments(_self) -> List[Dict]:
-        """List all assignments"""
+        """List assignments, newest first (at most MAX_ASSIGNMENTS)"""
         try:
-            result = _self.db.table("assignments").select("*").order("created_at", desc=True).execute()
+            result = _self.db.table("assignments").select("*").order("created_at", desc=True).limit(MAX_ASSIGNMENTS).execute()
             return result.data if result.data else []
         except Exception as e:
             st.error(f"Failed to load assignments: {e}")
@@ -146,8 +205,6 @@ class SupabaseAPI:
     def create_assignment(self, title: str, description: str, due_date: str, max_marks: int) -> Dict:
         """Create a new assignment (admin only)"""
         try:
-            self.list_assignments.clear()
-            
             result = self.db.table("assignments").insert({
                 "title": title,
                 "description": description,
@@ -158,71 +215,234 @@ class SupabaseAPI:
             
             if not result.data:
                 return {"error": "Failed to create assignment"}
+            
+            self.list_assignments.clear()
+            # Every user sees every assignment
+            for store in list(self._live_stores.values()):
+                store.put_assignment(result.data[0])
             return result.data[0]
         except Exception as e:
             return {"error": f"Failed to create assignment: {str(e)}"}
     
     def delete_assignment(self, assignment_id: int) -> Dict:
         """Delete an assignment"""
+        # Remove it from the cached data first; put it back if the delete fails
+        removed = [(store, store.remove_assignment(assignment_id)) for store in list(self._live_stores.values())]
         try:
-            self.list_assignments.clear()
             self.db.table("assignments").delete().eq("id", assignment_id).execute()
+            self.list_assignments.clear()
             return {"success": True}
         except Exception as e:
+            for store, rows in removed:
+                store.restore_assignment(*rows)
             return {"error": str(e)}
     
     # ============ Submissions ============
-    @st.cache_data(ttl=60)
-    def list_submissions(_self) -> List[Dict]:
+    def list_submissions(self) -> List[Dict]:
         """List submissions - filtered by role"""
+        return self.get_store().submissions
+    
+    def get_store(self) -> DataStore:
+        """Indexed assignments and submissions visible to the current user (read-only)"""
+        user = self._get_current_user()
+        if not user:
+            return DataStore([], [])
+        
+        # Every admin sees the same data, so admins share one cache entry;
+        # each student gets their own
+        if user.get("role") == "admin":
+            return self._get_store("admin", None)
+        return self._get_store("student", user["id"])
+    
+    @st.cache_resource(ttl=60)
+    def _get_store(_self, role: str, student_id: Optional[int]) -> DataStore:
+        """
+        Load and index the data one role/student sees
+        
+        Cached per argument pair and returned without copying, so the
+        indexes are built once per data version rather than on every rerun.
+        Both tables are read concurrently.
+        """
+        data = load_parallel(
+            assignments=_self.list_assignments,
+            submissions=lambda: _self._load_submissions(role, student_id)
+        )
+        store = DataStore(data["assignments"], data["submissions"])
+        _self._live_stores[(role, student_id)] = store
+        return store
+    
+    def _load_submissions(self, role: str, student_id: Optional[int]) -> List[Dict]:
+        """Query the submissions one role/student sees"""
         try:
-            user = _self._get_current_user()
-            if not user:
-                return []
-            
-            if user.get("role") == "admin":
-                # Admin sees all submissions with student info
-                result = _self.db.table("submissions").select(
-                    "*, users!student_id(name), assignments!assignment_id(title), reviews(*)"
-                ).order("submitted_at", desc=True).execute()
-            else:
+            query = self.db.table("submissions").select(STORE_SUBMISSION_COLUMNS)
+            if role != "admin":
                 # Student sees only their own
-                result = _self.db.table("submissions").select(
-                    "*, assignments!assignment_id(title), reviews(*)"
-                ).eq("student_id", user["id"]).order("submitted_at", desc=True).execute()
+                query = query.eq("student_id", student_id)
+            result = query.order("submitted_at", desc=True).execute()
             
-            # Transform response
-            submissions = []
-            for sub in result.data or []:
-                reviews = sub.get("reviews")
-                marks = None
-                feedback = None
-                
-                if reviews and isinstance(reviews, list) and len(reviews) > 0:
-                    first_review = reviews[0]
-                    if isinstance(first_review, dict):
-                        marks = first_review.get("marks")
-                        feedback = first_review.get("feedback")
-                
-                submission = {
-                    **sub,
-                    "student_name": sub.get("users", {}).get("name") if sub.get("users") else None,
-                    "assignment_title": sub.get("assignments", {}).get("title") if sub.get("assignments") else None,
-                    "marks": marks,
-                    "feedback": feedback,
-                }
-                submissions.append(submission)
-            
-            return submissions
+            return [_submission_row(sub) for sub in result.data or []]
         except Exception as e:
             st.error(f"Failed to load submissions: {e}")
             return []
     
+    def _invalidate_submissions(self, student_id: Optional[int] = None):
+        """
+        Drop the cached stores a change to one student's submissions affects
+        
+        That is the student's own store and the shared admin store; other
+        students' entries stay cached. Without a student ID everything is dropped.
+        """
+        if student_id is None:
+            self._get_store.clear()
+            return
+        self._get_store.clear("student", student_id)
+        self._get_store.clear("admin", None)
+    
+    # ============ Paged submissions ============
+    def fetch_submissions_page(
+        self,
+        status: Optional[str] = None,
+        assignment_id: Optional[int] = None,
+        after: Optional[Cursor] = None,
+        limit: int = SUBMISSIONS_PAGE_SIZE
+    ) -> Tuple[List[Dict], Optional[Cursor]]:
+        """
+        Fetch one page of the submissions the current user sees, newest first
+        
+        Uses keyset pagination on (submitted_at, id): each page starts right
+        after the previous page's last row, so the query cost does not grow
+        with how far the user has scrolled and rows added meanwhile do not
+        shift the pages. Filters are applied in the database.
+        
+        Args:
+            status: Only submissions with this status ("pending" / "reviewed")
+            assignment_id: Only submissions to this assignment
+            after: Cursor returned with the previous page (None for the first page)
+            limit: Rows per page
+        
+        Returns:
+            tuple: (rows, cursor for the next page, or None if this was the last)
+        """
+        user = self._get_current_user()
+        if not user:
+            return [], None
+        
+        query = self.db.table("submissions").select(SUBMISSION_COLUMNS)
+        if user.get("role") != "admin":
+            query = query.eq("student_id", user["id"])
+        if status is not None:
+            query = query.eq("status", status)
+        if assignment_id is not None:
+            query = query.eq("assignment_id", assignment_id)
+        if after is not None:
+            submitted_at, last_id = after
+            query = query.or_(
+                f'submitted_at.lt."{submitted_at}",'
+                f'and(submitted_at.eq."{submitted_at}",id.lt.{last_id})'
+            )
+        
+        # One extra row tells whether another page follows
+        result = query.order("submitted_at", desc=True).order("id", desc=True).limit(limit + 1).execute()
+        rows = [_submission_row(sub) for sub in result.data or []]
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, (rows[-1]["submitted_at"], rows[-1]["id"])
+    
+    def get_feed(self, page: str, **filters) -> SubmissionFeed:
+        """
+        The session's submission feed for a page and filters, with its first page loaded
+        
+        A session keeps a single feed: opening another page or changing
+        the filters replaces it, so at most MAX_SESSION_ROWS submission
+        rows are held per session.
+        """
+        key = (page, self._get_current_user_id(), tuple(sorted(filters.items())))
+        feed = st.session_state.get(FEED_KEY)
+        if feed is None or feed.key != key:
+            feed = SubmissionFeed(key, filters, MAX_SESSION_ROWS)
+            self.load_more(feed)
+            st.session_state[FEED_KEY] = feed
+        return feed
+    
+    def load_more(self, feed: SubmissionFeed):
+        """Append the next page to a feed (no-op once it is exhausted or full)"""
+        if not feed.has_more:
+            return
+        try:
+            rows, cursor = self.fetch_submissions_page(after=feed.cursor, **feed.filters)
+        except Exception as e:
+            st.error(f"Failed to load submissions: {e}")
+            return
+        feed.extend(rows, cursor)
+    
+    def get_submission(self, submission_id: int) -> Optional[Dict]:
+        """One submission with its joins, or None if not found or not visible to the user"""
+        user = self._get_current_user()
+        if not user:
+            return None
+        
+        try:
+            query = self.db.table("submissions").select(SUBMISSION_COLUMNS).eq("id", submission_id)
+            if user.get("role") != "admin":
+                query = query.eq("student_id", user["id"])
+            result = query.execute()
+            return _submission_row(result.data[0]) if result.data else None
+        except Exception as e:
+            st.error(f"Failed to load submission: {e}")
+            return None
+    
+    # ============ Local cache updates ============
+    def _stores_with_submission(self, submission_id: int) -> List[DataStore]:
+        """Cached stores holding a submission (the admin store and its student's)"""
+        return [store for store in list(self._live_stores.values()) if store.submission(submission_id)]
+    
+    def _update_locally(self, stores: List[DataStore], submission_id: int, **changes) -> List[tuple]:
+        """Change a submission row in each store, returning what _revert_locally needs to undo it"""
+        applied = []
+        for store in stores:
+            rows = store.update_submission(submission_id, **changes)
+            if rows:
+                applied.append((store, *rows))
+        return applied
+    
+    def _revert_locally(self, applied: List[tuple]):
+        """
+        Undo _update_locally row by row
+        
+        Stores are shared between sessions, so only the rows changed here
+        are put back, and only where they still hold this change.
+        """
+        for store, previous, updated in applied:
+            store.revert_submission(previous, updated)
+    
+    def _reconcile_submission(self, submission_id: int, student_id: int):
+        """
+        Replace a locally changed submission row with the server's copy (runs in the background)
+        
+        Picks up what only the server knows (defaults, timestamps, trigger
+        changes). If that fails the affected stores are dropped instead.
+        """
+        try:
+            result = self.db.table("submissions").select(
+                STORE_SUBMISSION_COLUMNS
+            ).eq("id", submission_id).execute()
+        except Exception:
+            self._invalidate_submissions(student_id)
+            raise
+        
+        for key in (("admin", None), ("student", student_id)):
+            store = self._live_stores.get(key)
+            if store is None:
+                continue
+            if result.data:
+                store.put_submission(_submission_row(result.data[0]))
+            else:
+                self._get_store.clear(*key)
+    
     def submit_assignment(self, assignment_id: int, file) -> Dict:
         """Submit an assignment with file upload"""
         try:
-            self.list_submissions.clear()
-            
             user_id = self._get_current_user_id()
             if not user_id:
                 return {"error": "Not authenticated"}
@@ -240,18 +460,32 @@ class SupabaseAPI:
             file_ext = file_name.split(".")[-1].lower()
             file_content = file.getvalue()
             
-            # Generate unique filename
-            unique_name = f"{user_id}_{assignment_id}_{uuid.uuid4().hex[:8]}_{file_name}"
+            # Files are stored once per content hash (same layout as the backend)
+            content_hash = hashlib.sha256(file_content).hexdigest()
+            storage_path = f"blobs/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}"
             
-            # Upload to Supabase Storage (just the path, not including bucket name)
-            storage_path = unique_name
+            blob = self.db.table("blobs").upsert({
+                "sha256": content_hash,
+                "size_bytes": len(file_content),
+                "last_uploaded_at": datetime.utcnow().isoformat() + "+00:00"
+            }, on_conflict="sha256").execute()
             
+            # Garbage collection claimed the blob before the refresh above and
+            # may be deleting its file: wait for it, then write the file again
+            gc_claimed = bool(blob.data and blob.data[0].get("gc_started_at"))
+            if gc_claimed:
+                self._wait_for_blob_gc(content_hash)
+            
+            # Upload to Supabase Storage (just the path, not including bucket name)
+            # unless the same file was uploaded before
+            bucket = self.db.storage.from_("submissions")
             try:
-                self.db.storage.from_("submissions").upload(
-                    storage_path,
-                    file_content,
-                    {"content-type": file.type}
-                )
+                if gc_claimed or not bucket.exists(storage_path):
+                    bucket.upload(
+                        storage_path,
+                        file_content,
+                        {"content-type": file.type, "upsert": "true"}
+                    )
             except Exception as upload_error:
                 # If bucket doesn't exist, try to handle gracefully
                 return {"error": f"File upload failed: {str(upload_error)}. Make sure 'submissions' bucket exists in Supabase Storage."}
@@ -262,26 +496,71 @@ class SupabaseAPI:
                 "assignment_id": assignment_id,
                 "file_path": storage_path,
                 "file_type": file_ext,
+                "content_hash": content_hash,
+                "original_filename": file_name,
                 "status": "pending"
             }).execute()
             
             if not result.data:
                 return {"error": "Failed to create submission record"}
             
-            return result.data[0]
+            # Add the row to the cached data; the background reconcile fills in the joins
+            submission = result.data[0]
+            user = self._get_current_user() or {}
+            own_store = self._live_stores.get(("student", user_id))
+            assignment = own_store.assignment(assignment_id) if own_store else None
+            row = {
+                **submission,
+                "student_name": user.get("name"),
+                "assignment_title": assignment.get("title") if assignment else None,
+                "marks": None,
+                "feedback": None,
+                "reviewed_at": None,
+            }
+            for key in (("admin", None), ("student", user_id)):
+                store = self._live_stores.get(key)
+                if store is not None:
+                    store.put_submission(row)
+            run_in_background(self._reconcile_submission, submission["id"], user_id)
+            return submission
         except Exception as e:
             return {"error": f"Submission failed: {str(e)}"}
     
+    def _wait_for_blob_gc(self, content_hash: str):
+        """Wait until garbage collection has released its claim on a blob (or the claim has expired)"""
+        deadline = time.monotonic() + BLOB_GC_LEASE_SECONDS
+        while time.monotonic() < deadline:
+            rows = self.db.table("blobs").select("gc_started_at").eq("sha256", content_hash).execute().data
+            if not rows or rows[0].get("gc_started_at") is None:
+                return
+            time.sleep(GC_WAIT_INTERVAL)
+        # The collector died holding the claim; take the blob back
+        self.db.table("blobs").update({"gc_started_at": None}).eq("sha256", content_hash).execute()
+    
     # ============ Reviews ============
     def create_review(self, submission_id: int, marks: int, feedback: str) -> Dict:
         """Create or update a review"""
+        user_id = self._get_current_user_id()
+        if not user_id:
+            return {"error": "Not authenticated"}
+        
+        # Show the grade right away (in the cached stores and this session's
+        # feed); undone if the write fails
+        stores = self._stores_with_submission(submission_id)
+        feed = st.session_state.get(FEED_KEY)
+        if feed is not None and feed.submission(submission_id):
+            stores.append(feed)
+        previous = stores[0].submission(submission_id) if stores else {}
+        applied = self._update_locally(
+            stores,
+            submission_id,
+            marks=marks,
+            feedback=feedback,
+            status="reviewed",
+            reviewed_at=previous.get("reviewed_at") or datetime.utcnow().isoformat() + "+00:00"
+        )
+        
         try:
-            self.list_submissions.clear()
-            
-            user_id = self._get_current_user_id()
-            if not user_id:
-                return {"error": "Not authenticated"}
-            
             # Check if already reviewed
             existing = self.db.table("reviews").select("id").eq("submission_id", submission_id).execute()
             
@@ -302,20 +581,41 @@ class SupabaseAPI:
                 }).execute()
             
             if not result.data:
+                self._revert_locally(applied)
                 return {"error": "Failed to save review"}
             
             # Update submission status
-            self.db.table("submissions").update({
+            updated = self.db.table("submissions").update({
                 "status": "reviewed"
             }).eq("id", submission_id).execute()
-            
-            return result.data[0]
         except Exception as e:
+            self._revert_locally(applied)
             return {"error": f"Review failed: {str(e)}"}
+        
+        if updated.data:
+            run_in_background(self._reconcile_submission, submission_id, updated.data[0]["student_id"])
+        else:
+            self._invalidate_submissions()
+        return result.data[0]
     
     # ============ Files ============
     def get_file_info(self, submission_id: int) -> Dict:
         """Get file metadata"""
+        # Listed submissions are already loaded (in this session's feed or the
+        # user's cached store); only look up others, without loading a store
+        feed = st.session_state.get(FEED_KEY)
+        sub = feed.submission(submission_id) if feed is not None else None
+        if sub is None:
+            user = self._get_current_user() or {}
+            key = ("admin", None) if user.get("role") == "admin" else ("student", user.get("id"))
+            store = self._live_stores.get(key)
+            sub = store.submission(submission_id) if store is not None else None
+        if sub:
+            return {
+                "file_type": sub.get("file_type"),
+                "file_path": sub.get("file_path")
+            }
+        
         try:
             result = self.db.table("submissions").select("*").eq("id", submission_id).execute()
             if not result.data:
@@ -329,31 +629,158 @@ class SupabaseAPI:
         except Exception as e:
             return {"error": str(e)}
     
-    def get_file_url(self, submission_id: int) -> Optional[str]:
-        """Get signed URL for file download/preview"""
+    def get_file_url(self, submission_id: int, file_path: Optional[str] = None) -> Optional[str]:
+        """
+        Get signed URL for file download/preview
+        
+        Pass file_path from an already-loaded submission row to skip the lookup query.
+        """
         try:
-            result = self.db.table("submissions").select("file_path").eq("id", submission_id).execute()
-            if not result.data:
-                return None
+            if file_path is None:
+                result = self.db.table("submissions").select("file_path").eq("id", submission_id).execute()
+                if not result.data:
+                    return None
+                file_path = result.data[0].get("file_path")
             
-            file_path = result.data[0].get("file_path")
             if not file_path:
                 return None
             
-            # Handle old file paths that may have different formats
-            # Remove 'submissions/' prefix if present (from old format)
-            if file_path.startswith("submissions/"):
-                file_path = file_path[len("submissions/"):]
-            # Also handle 'uploads/' prefix from legacy backend
-            elif file_path.startswith("uploads/"):
-                file_path = file_path[len("uploads/"):]
-            
-            # Get signed URL (valid for 1 hour)
-            url_data = self.db.storage.from_("submissions").create_signed_url(file_path, 3600)
-            return url_data.get("signedURL") if url_data else None
+            return self.get_signed_urls([file_path]).get(file_path)
         except Exception as e:
             st.error(f"Failed to get file URL: {e}")
             return None
+    
+    def get_signed_urls(self, file_paths: List[str]) -> Dict[str, str]:
+        """
+        Get signed URLs for many files with at most one storage call
+        
+        URLs are cached per storage path until SIGNED_URL_REFRESH_MARGIN
+        seconds before they expire; only uncached paths are signed, in a
+        single batch request.
+        
+        Args:
+            file_paths: file_path values from submission rows
+        
+        Returns:
+            dict: file_path -> signed URL (paths that could not be signed are left out)
+        """
+        now = time.time()
+        urls = {}
+        missing = {}
+        with self._signed_urls_lock:
+            for file_path in file_paths:
+                if not file_path:
+                    continue
+                cached = self._signed_urls.get((_storage_path(file_path), None))
+                if cached and cached[1] - SIGNED_URL_REFRESH_MARGIN > now:
+                    urls[file_path] = cached[0]
+                else:
+                    missing.setdefault(_storage_path(file_path), []).append(file_path)
+        
+        if not missing:
+            return urls
+        
+        signed = self.db.storage.from_("submissions").create_signed_urls(list(missing), SIGNED_URL_TTL)
+        expires_at = now + SIGNED_URL_TTL
+        with self._signed_urls_lock:
+            # Drop expired entries so the cache does not grow without bound
+            for key in [k for k, (_, expiry) in self._signed_urls.items() if expiry <= now]:
+                del self._signed_urls[key]
+            for item in signed:
+                url = item.get("signedURL") or item.get("signedUrl")
+                if item.get("error") or not url:
+                    continue
+                self._signed_urls[(item["path"], None)] = (url, expires_at)
+                for file_path in missing.get(item["path"], []):
+                    urls[file_path] = url
+        return urls
+
+    def get_download_url(self, submission: Dict) -> Optional[str]:
+        """
+        Signed URL that downloads a submission's file under the name it was uploaded with
+        
+        Files are stored under their content hash, so without a download
+        name the browser would save the bare hash with no extension.
+        Cached like get_signed_urls, per file and name.
+        """
+        file_path = submission.get("file_path")
+        if not file_path:
+            return None
+        
+        filename = _original_filename(submission)
+        key = (_storage_path(file_path), filename)
+        now = time.time()
+        with self._signed_urls_lock:
+            cached = self._signed_urls.get(key)
+        if cached and cached[1] - SIGNED_URL_REFRESH_MARGIN > now:
+            return cached[0]
+        
+        try:
+            signed = self.db.storage.from_("submissions").create_signed_url(
+                key[0], SIGNED_URL_TTL, {"download": filename}
+            )
+        except Exception as e:
+            st.error(f"Failed to get download URL: {e}")
+            return None
+        
+        url = signed.get("signedURL") or signed.get("signedUrl")
+        if url:
+            with self._signed_urls_lock:
+                self._signed_urls[key] = (url, now + SIGNED_URL_TTL)
+        return url
+
+
+def _submission_row(sub: Dict) -> Dict:
+    """Flatten a submissions row with embedded users/assignments/reviews for the pages"""
+    reviews = sub.get("reviews")
+    marks = None
+    feedback = None
+    reviewed_at = None
+    
+    if reviews and isinstance(reviews, list) and len(reviews) > 0:
+        first_review = reviews[0]
+        if isinstance(first_review, dict):
+            marks = first_review.get("marks")
+            feedback = first_review.get("feedback")
+            reviewed_at = first_review.get("reviewed_at")
+    
+    return {
+        **sub,
+        "student_name": sub.get("users", {}).get("name") if sub.get("users") else None,
+        "assignment_title": sub.get("assignments", {}).get("title") if sub.get("assignments") else None,
+        "marks": marks,
+        "feedback": feedback,
+        "reviewed_at": reviewed_at,
+    }
+
+
+def _original_filename(submission: Dict) -> str:
+    """
+    Filename the student uploaded
+    
+    Taken from the original_filename column; rows stored before it existed
+    embed the name in file_path (see LEGACY_UPLOAD_NAME).
+    """
+    if submission.get("original_filename"):
+        return submission["original_filename"]
+    name = submission["file_path"].rsplit("/", 1)[-1]
+    match = LEGACY_UPLOAD_NAME.match(name)
+    if match:
+        name = match.group(1)
+    if "." not in name and submission.get("file_type"):
+        name = f"{name}.{submission['file_type']}"
+    return name
+
+
+def _storage_path(file_path: str) -> str:
+    """Path inside the submissions bucket for a submissions.file_path value"""
+    # Remove 'submissions/' prefix if present (from old format)
+    if file_path.startswith("submissions/"):
+        return file_path[len("submissions/"):]
+    # Also handle 'uploads/' prefix from legacy backend
+    if file_path.startswith("uploads/"):
+        return file_path[len("uploads/"):]
+    return file_path
 
 
 # Singleton instance